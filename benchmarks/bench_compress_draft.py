@@ -0,0 +1,97 @@
+"""Compare full and draft-mode JPEG decoding when downsampling large scans.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_compress_draft --width 10000 --height 14000
+
+A synthetic scan of the given size is embedded in a one-page PDF and
+recompressed at each scale, once decoding the full bitmap before resizing
+and once letting libjpeg decode at reduced scale. Every run happens in a
+fresh process so that its peak RSS is not shared with the other runs.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pikepdf
+from PIL import Image
+
+from src.modules.compress import _recompress_image
+
+from benchmarks.bench_merge import peak_rss_mb, run_isolated
+
+MODES = ("full", "draft")
+
+
+def _jpeg_xobject(pdf, image, quality=85):
+    """Return an RGB JPEG image XObject holding ``image``."""
+    data = io.BytesIO()
+    image.save(data, format="JPEG", quality=quality)
+    return pdf.make_stream(
+        data.getvalue(), Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image, Width=image.width,
+        Height=image.height, ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8, Filter=pikepdf.Name.DCTDecode,
+    )
+
+
+def make_scan(path: str, width: int, height: int):
+    """Write a one-page PDF holding a single noisy grayscale-ish JPEG scan."""
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(612, 792))
+    image = Image.merge("RGB", [Image.effect_noise((width, height), 40)] * 3)
+    pdf.pages[0].Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=_jpeg_xobject(pdf, image)))
+    del image
+    pdf.pages[0].Contents = pdf.make_stream(b"q 612 0 0 792 0 0 cm /Im0 Do Q")
+    pdf.save(path)
+
+
+def _run(mode: str, input_file: str, scale: float, results):
+    start = time.perf_counter()
+    with pikepdf.open(input_file) as pdf:
+        image = pikepdf.PdfImage(pdf.pages[0].Resources.XObject.Im0).as_pil_image()
+        if mode == "full":
+            # Once loaded, draft() can no longer shrink the decode.
+            image.load()
+        _, width, height, _ = _recompress_image(image, scale, 60)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, peak_rss_mb(), f"{width}x{height}"))
+
+
+def run_benchmark(mode: str, input_file: str, scale: float) -> dict:
+    elapsed, peak, size = run_isolated(_run, mode, input_file, scale)
+    return {"mode": mode, "scale": scale, "size": size, "seconds": elapsed, "peak_rss_mb": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=5000)
+    parser.add_argument("--height", type=int, default=7000)
+    parser.add_argument("--scales", nargs="+", type=float, default=[0.5, 0.25])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "scan.pdf")
+        # Build the scan in its own process too: a child inherits its
+        # parent's peak RSS, which would hide the difference being measured.
+        proc = multiprocessing.get_context("spawn").Process(
+            target=make_scan, args=(input_file, args.width, args.height)
+        )
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise RuntimeError(f"make_scan exited with code {proc.exitcode}")
+
+        print(f"{'scale':>8}{'mode':>8}{'output':>14}{'seconds':>10}{'peak MB':>10}")
+        for scale in args.scales:
+            for mode in MODES:
+                result = run_benchmark(mode, input_file, scale)
+                print(
+                    f"{result['scale']:>8.2f}{result['mode']:>8}{result['size']:>14}"
+                    f"{result['seconds']:>10.2f}{result['peak_rss_mb']:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare page extraction engines by time and peak memory.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_extract
+
+Each fixture is extracted with a few scattered pages, half of its pages and
+all of them. Every run happens in a fresh process so that its peak RSS is not
+shared with the other runs.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+from src.modules.split import EXTRACT_ENGINES, Splitter
+
+from benchmarks.bench_merge import DATA_DIR, peak_rss_mb, run_isolated
+
+DEFAULT_INPUTS = ["heavy_mixed.pdf", "large_file.pdf", "big_text.pdf"]
+
+SELECTIONS = {
+    "few": lambda count: sorted({0, count // 2, count - 1}),
+    "half": lambda count: list(range(0, count, 2)),
+    "all": lambda count: list(range(count)),
+}
+
+
+def _run(engine: str, input_file: str, selection: str, output_file: str, results):
+    start = time.perf_counter()
+    with Splitter(input_file) as splitter:
+        pages = SELECTIONS[selection](splitter.page_count)
+        splitter.extract_pages(output_file, pages, prune_resources=True, engine=engine)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, peak_rss_mb(), len(PdfReader(output_file).pages)))
+
+
+def run_benchmark(engine: str, input_file: str, selection: str, output_file: str) -> dict:
+    elapsed, peak, pages = run_isolated(_run, engine, input_file, selection, output_file)
+    return {
+        "engine": engine,
+        "pages": pages,
+        "seconds": elapsed,
+        "peak_rss_mb": peak,
+        "output_mb": os.path.getsize(output_file) / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=list(EXTRACT_ENGINES), choices=list(EXTRACT_ENGINES))
+    parser.add_argument("--selections", nargs="+", default=list(SELECTIONS), choices=list(SELECTIONS))
+    parser.add_argument("inputs", nargs="*", help="PDFs to extract from (defaults to test fixtures)")
+    args = parser.parse_args()
+
+    inputs = args.inputs or [str(DATA_DIR / name) for name in DEFAULT_INPUTS]
+
+    print(f"{'input':<20}{'pages':>8}{'engine':>10}{'seconds':>10}{'peak MB':>10}{'out MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for input_file in inputs:
+            for selection in args.selections:
+                for engine in args.engines:
+                    output_file = os.path.join(tmp_dir, f"{engine}.pdf")
+                    result = run_benchmark(engine, input_file, selection, output_file)
+                    print(
+                        f"{os.path.basename(input_file):<20}{result['pages']:>8}{result['engine']:>10}"
+                        f"{result['seconds']:>10.2f}{result['peak_rss_mb']:>10.1f}{result['output_mb']:>10.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
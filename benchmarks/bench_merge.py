@@ -0,0 +1,124 @@
+"""Compare merge engines by throughput and peak memory.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_merge --copies 200
+
+Each engine runs in a fresh process so that its peak RSS is not shared with
+the other runs.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from src.modules.merge import Merger
+
+DATA_DIR = Path(__file__).parent.parent / "tests" / "data"
+DEFAULT_INPUTS = ["sample.pdf", "multi_small_0.pdf", "with_notes.pdf", "scan_like.pdf", "big_text.pdf"]
+
+
+ENGINES = {
+    "in-memory": {},
+    "streaming": {"streaming": True},
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_isolated(target, *args, timeout: float = 3600):
+    """Run ``target(*args, results)`` in a fresh interpreter and return what it puts on ``results``.
+
+    A fresh process keeps one run's peak RSS from leaking into the next.
+    Raises ``RuntimeError`` if the child dies or times out without a result,
+    or exits with a non-zero code.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    proc = context.Process(target=target, args=(*args, results))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                result = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not proc.is_alive():
+                    # A result put just before exiting may still be in flight.
+                    try:
+                        result = results.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        raise RuntimeError(
+                            f"{target.__name__} exited with code {proc.exitcode} without a result"
+                        ) from None
+                if time.monotonic() > deadline:
+                    proc.kill()
+                    raise RuntimeError(f"{target.__name__} timed out after {timeout}s") from None
+    finally:
+        proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"{target.__name__} exited with code {proc.exitcode}")
+    return result
+
+
+def _run(engine: str, input_files: list[str], output_file: str, results):
+    start = time.perf_counter()
+    with Merger() as merger:
+        merger.process(input_files, output_file, **ENGINES[engine])
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    results.put((elapsed, peak, len(PdfReader(output_file).pages)))
+
+
+def run_benchmark(engine: str, input_files: list[str], output_file: str) -> dict:
+    elapsed, peak, pages = run_isolated(_run, engine, input_files, output_file)
+    return {
+        "engine": engine,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else float("inf"),
+        "peak_rss_mb": peak,
+        "output_mb": os.path.getsize(output_file) / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=100, help="how many times to repeat the input set")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("inputs", nargs="*", help="PDFs to merge (defaults to test fixtures)")
+    args = parser.parse_args()
+
+    inputs = args.inputs or [str(DATA_DIR / name) for name in DEFAULT_INPUTS]
+    input_files = inputs * args.copies
+
+    print(f"Merging {len(input_files)} inputs")
+    print(f"{'engine':<12}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'peak MB':>10}{'out MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for engine in args.engines:
+            result = run_benchmark(engine, input_files, os.path.join(tmp_dir, f"{engine}.pdf"))
+            print(
+                f"{result['engine']:<12}{result['pages']:>8}{result['seconds']:>10.2f}"
+                f"{result['pages_per_sec']:>10.0f}{result['peak_rss_mb']:>10.1f}{result['output_mb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measure how a parallel merge scales with the number of worker processes.
+
+One worker is the plain streaming merge; more workers stream contiguous
+chunks concurrently and join them in a final byte-copy pass.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_merge_scaling --copies 100 --max-workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.modules.merge import Merger
+
+from benchmarks.bench_merge import DATA_DIR, DEFAULT_INPUTS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=100, help="how many times to repeat the input set")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("inputs", nargs="*", help="PDFs to merge (defaults to test fixtures)")
+    args = parser.parse_args()
+
+    inputs = args.inputs or [str(DATA_DIR / name) for name in DEFAULT_INPUTS]
+    input_files = inputs * args.copies
+
+    print(f"Merging {len(input_files)} inputs on up to {args.max_workers} workers")
+    print(f"{'workers':>8}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'speedup':>10}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = os.path.join(tmp_dir, "merged.pdf")
+        for workers in range(1, args.max_workers + 1):
+            start = time.perf_counter()
+            with Merger() as merger:
+                stats = merger.process(input_files, output_file, streaming=True, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>8}{stats['page_count']:>8}{elapsed:>10.2f}"
+                f"{stats['page_count'] / elapsed:>10.0f}{baseline / elapsed:>10.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
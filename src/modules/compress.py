@@ -1,5 +1,48 @@
-import pikepdf
+import hashlib
+import io
+import math
 import os
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pikepdf
+from PIL import Image, ImageChops
+
+from src.modules.pdf_utils import dedupe_objects
+
+
+# (JPEG quality, scale) from mildest to harshest, tried by target-size compression.
+_TARGET_STEPS = ((85, 1.0), (75, 1.0), (60, 0.75), (50, 0.6), (40, 0.5), (30, 0.35), (25, 0.25))
+# Images recompressed to estimate each step.
+_TARGET_SAMPLE = 8
+
+# An image is gray when all but this share of its pixels have channels
+# within _GRAY_TOLERANCE of each other, which allows for JPEG colour noise.
+_GRAY_TOLERANCE = 12
+_COLOR_SHARE = 0.005
+# A gray image is bilevel when pixels between _DARK and _LIGHT are at most
+# this share of the image and no more than the dark ones: text scans keep
+# midtones along glyph edges, fewer than the ink itself, while photos and
+# gray fills have more. It also needs at least _TONE_SHARE of both dark and
+# light pixels, so pale gradients and faint tinted scans stay gray.
+_DARK = 64
+_LIGHT = 192
+_MIDTONE_SHARE = 0.1
+_TONE_SHARE = 0.002
+
+# Lossless filters any reader decodes, which _recompress_streams replaces with Flate.
+_GENERIC_FILTERS = ("/FlateDecode", "/LZWDecode", "/ASCII85Decode", "/ASCIIHexDecode", "/RunLengthDecode")
+
+# Stream entries written for each encoding _recompress_image picks:
+# (filter, colour space, bits per component).
+_ENCODINGS = {
+    "rgb": ("/DCTDecode", "/DeviceRGB", 8),
+    "gray": ("/DCTDecode", "/DeviceGray", 8),
+    "ccitt": ("/CCITTFaxDecode", "/DeviceGray", 1),
+    "flate": ("/FlateDecode", "/DeviceGray", 1),
+}
 
 
 class Compressor:
@@ -8,67 +51,210 @@ class Compressor:
     def __init__(self, input_path: str):
         self.input_path = input_path
 
-    def compress(self, output_path: str, level: str = "medium", progress_callback=None) -> dict:
+    def compress(
+        self,
+        output_path: str,
+        level: str = "medium",
+        progress_callback=None,
+        workers: int = 1,
+        target_dpi: float | None = None,
+        target_bytes: int | None = None,
+    ) -> dict:
         """Compress PDF and return compression stats.
-        
+
+        Images are collected in a first pass, recompressed, and written back
+        in a final pass. Every image stream reachable from a page, including
+        those drawn inside Form XObjects and tiling patterns, is recompressed
+        once however many times it is used, and rewritten in place so that
+        all references pick up the new data. Resizing and JPEG encoding, and
+        decoding of JPEG images, happen in Pillow, which releases the GIL, so
+        with ``workers`` above 1 images are recompressed concurrently on a
+        thread pool.
+
+        With ``target_dpi`` the level's fixed scale is replaced by one per
+        image: content streams are scanned for where each image is drawn, and
+        only images whose effective resolution exceeds ``target_dpi`` are
+        downsampled, to that resolution. An image drawn several times is
+        judged by its largest placement, so it stays sharp everywhere.
+
+        The "lossless" level leaves every image untouched and only rewrites
+        the file losslessly, see ``_compress_lossless``.
+
+        With ``target_bytes`` the level is ignored and the mildest quality
+        and scale expected to fit are chosen instead, by recompressing a
+        sample of the images rather than the whole document. The estimate
+        is then corrected against the written file, and if another step
+        fits better one more pass is made, so the file is written at most
+        twice.
+
         Args:
             output_path: Path to save compressed PDF
-            level: Compression level - "low", "medium", or "high"
-            progress_callback: Optional callback for progress updates
+            level: Compression level - "low", "medium", "high" or "lossless"
+            progress_callback: Optional ``callback(image_number, total_images)``
+                called as each image is recompressed
+            workers: Number of threads recompressing images
+            target_dpi: Optional resolution to downsample images to
+            target_bytes: Optional size the output should fit in
+
+        Returns:
+            Dict with sizes, ``reduction_percent``, and ``images``, one entry
+            per recompressed image with its ``object`` number, original
+            ``width`` and ``height``, effective ``dpi`` (``None`` when not
+            measured or never drawn), the ``scale`` applied, whether it
+            was ``downsampled``, and its new size in ``bytes`` and
+            ``encoding`` ("rgb" or "gray" JPEG, or "ccitt" or "flate" for one
+            bit per pixel; both ``None`` if it could not be recompressed).
+            With ``target_bytes`` it also holds the ``quality`` and ``scale``
+            chosen and the number of ``passes``.
+            With the "lossless" level it holds ``savings`` instead, the
+            bytes each step saved.
+        """
+        if target_bytes is not None and target_bytes <= 0:
+            raise ValueError("Target size must be positive")
+
+        original_size = os.path.getsize(self.input_path)
+
+        savings = None
+        if level == "lossless" and target_bytes is None:
+            savings = self._compress_lossless(output_path)
+            decisions = []
+        elif target_bytes is None:
+            quality_map = {"low": 85, "medium": 60, "high": 40}
+            jpeg_quality = quality_map.get(level, 60)
+
+            scale_map = {"low": 1.0, "medium": 0.75, "high": 0.5}
+            # With a target resolution, that alone decides the scale.
+            scale_factor = 1.0 if target_dpi else scale_map.get(level, 0.75)
+
+            decisions = self._compress_pass(
+                output_path, jpeg_quality, scale_factor, target_dpi, workers, progress_callback
+            )
+        else:
+            decisions, jpeg_quality, scale_factor, passes = self._compress_to_size(
+                output_path, target_bytes, target_dpi, workers, progress_callback
+            )
+
+        compressed_size = os.path.getsize(output_path)
+        reduction = ((original_size - compressed_size) / original_size) * 100
+
+        stats = {
+            "original_size": original_size,
+            "compressed_size": compressed_size,
+            "reduction_percent": reduction,
+            "images": decisions,
+        }
+        if target_bytes is not None:
+            stats.update(quality=jpeg_quality, scale=scale_factor, passes=passes)
+        if savings is not None:
+            stats["savings"] = savings
+        return stats
+
+    def _compress_lossless(self, output_path: str) -> dict:
+        """Rewrite the PDF without touching any pixels and return the bytes each step saved.
+
+        Steps run in order, and after each one the document is saved to
+        memory, so each figure is what that step saved on top of the
+        ones before it. Until the ``flate`` step streams are saved as they
+        are, so compression is not credited to the steps before it.
+
+        - ``orphaned_objects``: objects unreachable from the trailer, such as
+          those left behind by incremental updates, which a rewrite drops;
+          counted as the bytes qpdf would write for them
+        - ``reserialization``: the rest of the difference made by rewriting
+          the file, negative when qpdf's layout is larger than the original's;
+          with it the figures add up to the total saving
+        - ``thumbnails``: embedded page thumbnails
+        - ``metadata``: XMP metadata attached to pages, images, fonts and
+          other objects; the document's own metadata is kept
+        - ``javascript``: document-level scripts and JavaScript actions
+        - ``duplicate_icc_profiles`` and ``duplicate_streams``: streams with
+          the same data and dictionary as an earlier one, ICC profiles first
+        - ``flate``: streams stored uncompressed or with generic lossless
+          filters Flate-encoded at maximum level, where that is smaller
+        - ``object_streams``: objects packed into compressed object streams,
+          unless that makes the file larger
         """
-        from PIL import Image
-        import io
-        
         original_size = os.path.getsize(self.input_path)
-        
-        quality_map = {"low": 85, "medium": 60, "high": 40}
-        jpeg_quality = quality_map.get(level, 60)
-        
-        scale_map = {"low": 1.0, "medium": 0.75, "high": 0.5}
-        scale_factor = scale_map.get(level, 0.75)
-        
+        savings = {}
+        # Stream data is written exactly as held, so only _recompress_streams changes it.
+        as_is = {"compress_streams": False, "stream_decode_level": pikepdf.StreamDecodeLevel.none}
         with pikepdf.open(self.input_path) as pdf:
-            total_pages = len(pdf.pages)
-            
-            for idx, page in enumerate(pdf.pages):
-                if progress_callback:
-                    progress_callback(idx, total_pages)
-                
-                if "/Resources" in page and "/XObject" in page["/Resources"]:
-                    for key in list(page["/Resources"]["/XObject"].keys()):
-                        obj = page["/Resources"]["/XObject"][key]
-                        
-                        if "/Subtype" in obj and obj["/Subtype"] == "/Image":
-                            try:
-                                raw_image = pikepdf.PdfImage(obj)
-                                pil_image = raw_image.as_pil_image()
-                                
-                                if scale_factor < 1.0:
-                                    new_width = int(pil_image.width * scale_factor)
-                                    new_height = int(pil_image.height * scale_factor)
-                                    pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                                
-                                img_bytes = io.BytesIO()
-                                pil_image.save(img_bytes, format='JPEG', quality=jpeg_quality, optimize=True)
-                                img_bytes.seek(0)
-                                
-                                new_image = pikepdf.Stream(pdf, img_bytes.read())
-                                new_image.stream_dict = pikepdf.Dictionary(
-                                    Type=pikepdf.Name("/XObject"),
-                                    Subtype=pikepdf.Name("/Image"),
-                                    Width=obj["/Width"],
-                                    Height=obj["/Height"],
-                                    ColorSpace=pikepdf.Name("/DeviceRGB"),
-                                    BitsPerComponent=8,
-                                    Filter=pikepdf.Name("/DCTDecode"),
-                                )
-                                
-                                page["/Resources"]["/XObject"][key] = new_image
-                            except Exception:
-                                pass
-            
+            size = _saved_size(pdf, **as_is)
+            savings["orphaned_objects"] = _orphaned_size(pdf)
+            savings["reserialization"] = original_size - size - savings["orphaned_objects"]
+
+            for step, apply in (
+                ("thumbnails", _remove_thumbnails),
+                ("metadata", _remove_object_metadata),
+                ("javascript", _remove_javascript),
+                ("duplicate_icc_profiles", _dedupe_icc_profiles),
+                ("duplicate_streams", lambda pdf: _dedupe_streams(pdf, lambda stream: True)),
+                ("flate", _recompress_streams),
+            ):
+                if not apply(pdf):
+                    savings[step] = 0
+                    continue
+                new_size = _saved_size(pdf, **as_is)
+                savings[step] = size - new_size
+                size = new_size
+
+            pdf.save(output_path, object_stream_mode=pikepdf.ObjectStreamMode.generate, **as_is)
+            if os.path.getsize(output_path) > size:
+                # Too few objects for the packing to pay for itself.
+                pdf.save(output_path, **as_is)
+        savings["object_streams"] = size - os.path.getsize(output_path)
+        return savings
+
+    def _compress_pass(
+        self, output_path: str, jpeg_quality: int, scale_factor: float, target_dpi, workers: int, progress_callback
+    ) -> list:
+        """Recompress every image at ``jpeg_quality``, save to ``output_path`` and return per-image decisions."""
+        with pikepdf.open(self.input_path) as pdf:
+            images = _collect_images(pdf)
+            dpis = _effective_dpis(pdf) if target_dpi else {}
+            decisions = []
+            for image in images:
+                dpi = dpis.get(image.objgen)
+                decisions.append({
+                    "object": image.objgen[0],
+                    "width": int(image.Width),
+                    "height": int(image.Height),
+                    "dpi": dpi,
+                    "scale": _dpi_scale(dpi, target_dpi) * scale_factor,
+                    "downsampled": False,
+                    "bytes": None,
+                    "encoding": None,
+                })
+            results = _recompress_images(
+                images, [decision["scale"] for decision in decisions], jpeg_quality, workers, progress_callback
+            )
+
+            for image, result, decision in zip(images, results, decisions, strict=True):
+                if result is None:
+                    continue
+                data, width, height, encoding = result
+                decision["downsampled"] = decision["scale"] < 1.0
+                decision["bytes"] = len(data)
+                decision["encoding"] = encoding
+                filter_name, color_space, bits = _ENCODINGS[encoding]
+                for key in ("/DecodeParms", "/Decode"):
+                    if key in image:
+                        del image[key]
+                if encoding == "ccitt":
+                    decode_parms = pikepdf.Dictionary(K=-1, Columns=width, Rows=height, BlackIs1=True)
+                    image.write(data, filter=pikepdf.Name(filter_name), decode_parms=decode_parms)
+                else:
+                    image.write(data, filter=pikepdf.Name(filter_name))
+                image.Width = width
+                image.Height = height
+                image.ColorSpace = pikepdf.Name(color_space)
+                image.BitsPerComponent = bits
+                # A colour-key mask names sample values, which JPEG does not preserve.
+                if "/Mask" in image and isinstance(image.Mask, pikepdf.Array):
+                    del image["/Mask"]
+
             pdf.remove_unreferenced_resources()
-            
+
             pdf.save(
                 output_path,
                 compress_streams=True,
@@ -77,15 +263,77 @@ class Compressor:
                 normalize_content=True,
                 linearize=False,
             )
-        
-        compressed_size = os.path.getsize(output_path)
-        reduction = ((original_size - compressed_size) / original_size) * 100
-        
-        return {
-            "original_size": original_size,
-            "compressed_size": compressed_size,
-            "reduction_percent": reduction
-        }
+        return decisions
+
+    def _compress_to_size(self, output_path: str, target_bytes: int, target_dpi, workers: int, progress_callback):
+        """Compress at the mildest step of ``_TARGET_STEPS`` expected to fit ``target_bytes``.
+
+        Images are estimated at their raw bytes times the ratio a sample of
+        them reaches at that step. The sample spans the range of image sizes,
+        and steps are binary searched, so each step tried costs a handful of
+        image recompressions. The first pass measures what images and the
+        rest of the file really came to; both parts of the estimate are
+        corrected by that, and if the corrected estimate picks a harsher
+        step, or a milder one that still fits, a second pass is made. A
+        milder pass only replaces the first one if it fits. Returns
+        ``(decisions, quality, scale, passes)``.
+        """
+        with pikepdf.open(self.input_path) as pdf:
+            images = _collect_images(pdf)
+            dpis = _effective_dpis(pdf) if target_dpi else {}
+            raw_sizes = [len(image.read_raw_bytes()) for image in images]
+            sample = _sample_indexes(raw_sizes, _TARGET_SAMPLE)
+            sample_bytes = sum(raw_sizes[index] for index in sample)
+            image_estimates = {}
+
+            def image_estimate(step):
+                if step not in image_estimates:
+                    jpeg_quality, scale_factor = _TARGET_STEPS[step]
+                    recompressed = 0
+                    for index in sample:
+                        scale = _dpi_scale(dpis.get(images[index].objgen), target_dpi) * scale_factor
+                        result = _recompress_image(_open_image(images[index]), scale, jpeg_quality)
+                        recompressed += len(result[0]) if result else raw_sizes[index]
+                    ratio = recompressed / sample_bytes if sample_bytes else 1.0
+                    image_estimates[step] = sum(raw_sizes) * ratio
+                return image_estimates[step]
+
+            # Until a pass is measured, assume the rest of the file keeps its size.
+            other_bytes = max(0, os.path.getsize(self.input_path) - sum(raw_sizes))
+            step = _first_fitting(lambda step: other_bytes + image_estimate(step), 0, target_bytes) if images else 0
+            decisions = self._compress_pass(output_path, *_TARGET_STEPS[step], target_dpi, workers, progress_callback)
+            if not images:
+                return decisions, *_TARGET_STEPS[step], 1
+
+            compressed_size = os.path.getsize(output_path)
+            image_bytes = sum(
+                raw if decision["bytes"] is None else decision["bytes"]
+                for decision, raw in zip(decisions, raw_sizes, strict=True)
+            )
+            other_bytes = compressed_size - image_bytes
+            correction = image_bytes / image_estimate(step) if image_estimate(step) else 1.0
+            retry = _first_fitting(lambda step: other_bytes + image_estimate(step) * correction, 0, target_bytes)
+
+        if compressed_size > target_bytes and retry > step:
+            decisions = self._compress_pass(
+                output_path, *_TARGET_STEPS[retry], target_dpi, workers, progress_callback
+            )
+            return decisions, *_TARGET_STEPS[retry], 2
+        if compressed_size <= target_bytes and retry < step:
+            fd, retry_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(os.path.abspath(output_path)))
+            os.close(fd)
+            try:
+                retry_decisions = self._compress_pass(
+                    retry_path, *_TARGET_STEPS[retry], target_dpi, workers, progress_callback
+                )
+                if os.path.getsize(retry_path) <= target_bytes:
+                    os.replace(retry_path, output_path)
+                    return retry_decisions, *_TARGET_STEPS[retry], 2
+            finally:
+                if os.path.exists(retry_path):
+                    os.remove(retry_path)
+            return decisions, *_TARGET_STEPS[step], 2
+        return decisions, *_TARGET_STEPS[step], 1
 
     def __enter__(self):
         return self
@@ -96,4 +344,465 @@ class Compressor:
     @staticmethod
     def get_compression_levels():
         """Get available compression levels."""
-        return ["low", "medium", "high"]
+        return ["low", "medium", "high", "lossless"]
+
+
+def _saved_size(pdf: pikepdf.Pdf, **options) -> int:
+    """Return how many bytes ``pdf.save`` writes with ``options``.
+
+    Saving to memory is several times faster than counting through a Python
+    ``write``, as qpdf writes in small pieces.
+    """
+    buffer = io.BytesIO()
+    pdf.save(buffer, **options)
+    return buffer.tell()
+
+
+def _remove_thumbnails(pdf: pikepdf.Pdf) -> int:
+    """Drop page thumbnails; return how many were removed."""
+    removed = 0
+    for page in pdf.pages:
+        if "/Thumb" in page:
+            del page["/Thumb"]
+            removed += 1
+    return removed
+
+
+def _remove_object_metadata(pdf: pikepdf.Pdf) -> int:
+    """Drop metadata streams of every object but the catalog; return how many were removed."""
+    root = pdf.Root.objgen
+    removed = 0
+    for obj in pdf.objects:
+        if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)) and obj.objgen != root and "/Metadata" in obj:
+            del obj["/Metadata"]
+            removed += 1
+    return removed
+
+
+def _remove_javascript(pdf: pikepdf.Pdf) -> int:
+    """Drop the document's named scripts and every JavaScript action, keeping other actions.
+
+    Returns how many scripts and actions were removed.
+    """
+    removed = 0
+    if "/Names" in pdf.Root and "/JavaScript" in pdf.Root.Names:
+        del pdf.Root.Names["/JavaScript"]
+        removed += 1
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Dictionary):
+            continue
+        for key in ("/A", "/OpenAction"):
+            if key in obj and _is_javascript(obj[key]):
+                del obj[key]
+                removed += 1
+        if "/AA" in obj and isinstance(obj.AA, pikepdf.Dictionary):
+            for trigger in list(obj.AA.keys()):
+                if _is_javascript(obj.AA[trigger]):
+                    del obj.AA[trigger]
+                    removed += 1
+            if not obj.AA.keys():
+                del obj["/AA"]
+    return removed
+
+
+def _is_javascript(action) -> bool:
+    return isinstance(action, pikepdf.Dictionary) and "/S" in action and action.S == "/JavaScript"
+
+
+def _orphaned_size(pdf: pikepdf.Pdf) -> int:
+    """Return how many bytes qpdf would write for the objects unreachable from the trailer."""
+    reachable = set()
+    pending = [pdf.trailer]
+    while pending:
+        obj = pending.pop()
+        items = enumerate(obj) if isinstance(obj, pikepdf.Array) else obj.items()
+        for _, value in items:
+            if not isinstance(value, (pikepdf.Dictionary, pikepdf.Stream, pikepdf.Array)):
+                continue
+            if value.is_indirect:
+                if value.objgen in reachable:
+                    continue
+                reachable.add(value.objgen)
+            pending.append(value)
+
+    size = 0
+    for obj in pdf.objects:
+        if obj.objgen in reachable:
+            continue
+        num, generation = obj.objgen
+        # Header, "endobj" and the object's xref entry.
+        size += len(f"{num} {generation} obj\n\nendobj\n") + 20
+        if isinstance(obj, pikepdf.Stream):
+            size += len(obj.stream_dict.unparse()) + len(b"\nstream\n\nendstream") + len(obj.read_raw_bytes())
+        else:
+            size += len(obj.unparse(resolved=True))
+    return size
+
+
+def _icc_profiles(pdf: pikepdf.Pdf) -> set:
+    """Return the ``objgen`` of every stream used as the profile of an ``/ICCBased`` colour space."""
+    profiles = set()
+    pending = [obj for obj in pdf.objects if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream, pikepdf.Array))]
+    while pending:
+        obj = pending.pop()
+        if isinstance(obj, pikepdf.Array):
+            if len(obj) == 2 and obj[0] == pikepdf.Name.ICCBased and isinstance(obj[1], pikepdf.Stream):
+                profiles.add(obj[1].objgen)
+            values = list(obj)
+        else:
+            values = [value for _, value in obj.items()]
+        # Indirect children are visited from pdf.objects already.
+        pending.extend(
+            value for value in values
+            if isinstance(value, (pikepdf.Dictionary, pikepdf.Array)) and not value.is_indirect
+        )
+    return profiles
+
+
+def _dedupe_icc_profiles(pdf: pikepdf.Pdf) -> int:
+    """Deduplicate the streams ``_icc_profiles`` finds, see ``_dedupe_streams``."""
+    profiles = _icc_profiles(pdf)
+    return _dedupe_streams(pdf, lambda stream: stream.objgen in profiles)
+
+
+def _recompress_streams(pdf: pikepdf.Pdf) -> int:
+    """Flate-encode at maximum level the streams stored uncompressed or with generic lossless filters.
+
+    This is done here with zlib rather than by qpdf on save, since qpdf's
+    compression level is a process-wide setting that cannot be read back.
+    XMP metadata stays uncompressed, as qpdf leaves it, and a stream is only
+    replaced when that makes it smaller. Returns how many were replaced.
+    """
+    replaced = 0
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Stream) or obj.get("/Type") == pikepdf.Name.Metadata:
+            continue
+        filters = obj.get("/Filter", pikepdf.Array())
+        filters = [filters] if isinstance(filters, pikepdf.Name) else list(filters)
+        if not all(name in _GENERIC_FILTERS for name in filters):
+            continue
+        try:
+            data = zlib.compress(obj.read_bytes(pikepdf.StreamDecodeLevel.generalized), 9)
+        except Exception:
+            continue
+        if len(data) < len(obj.read_raw_bytes()):
+            obj.write(data, filter=pikepdf.Name.FlateDecode)
+            replaced += 1
+    return replaced
+
+
+def _dedupe_streams(pdf: pikepdf.Pdf, predicate) -> int:
+    """Point references to streams matching ``predicate`` at the first one with the same data and dictionary.
+
+    Dropped streams are left unreachable for the save to skip. Returns how
+    many streams were dropped.
+    """
+    def candidates():
+        return ((obj.objgen, obj) for obj in pdf.objects if isinstance(obj, pikepdf.Stream) and predicate(obj))
+
+    def key(objgen, obj):
+        stream_dict = pikepdf.Dictionary({key: value for key, value in obj.items() if key != "/Length"})
+        return hashlib.sha256(obj.read_raw_bytes()).digest(), stream_dict.unparse()
+
+    def rewire(replaced):
+        kept = {objgen: pdf.get_object(target) for objgen, target in replaced.items()}
+        for obj in pdf.objects:
+            if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream, pikepdf.Array)):
+                _rewire(obj, kept)
+        _rewire(pdf.trailer, kept)
+
+    return len(dedupe_objects(candidates, key, rewire))
+
+
+def _rewire(obj, replaced: dict):
+    """Replace references to ``replaced`` keys inside ``obj`` and its direct children."""
+    items = obj.items() if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)) else enumerate(obj)
+    for key, value in list(items):
+        if not isinstance(value, pikepdf.Object):
+            continue
+        if value.is_indirect:
+            if value.objgen in replaced:
+                obj[key] = replaced[value.objgen]
+        elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+            _rewire(value, replaced)
+
+
+def _collect_images(pdf: pikepdf.Pdf) -> list:
+    """Return every image XObject drawn by the document's pages, each one once.
+
+    Page resources are walked depth-first into Form XObjects and tiling
+    patterns, which carry resources of their own. Images and forms are keyed
+    by object number so shared ones are visited once, and cycles between
+    forms end. Stencil masks are left alone: they are painted in the current
+    colour and have no colour data to recompress.
+    """
+    images = []
+    seen = set()
+
+    def visit(resources):
+        for category in ("/XObject", "/Pattern"):
+            if category not in resources:
+                continue
+            for _, obj in resources[category].items():
+                if not isinstance(obj, pikepdf.Stream) or obj.objgen in seen:
+                    continue
+                seen.add(obj.objgen)
+                if "/Subtype" in obj and obj.Subtype == "/Image":
+                    if not obj.get("/ImageMask", False):
+                        images.append(obj)
+                elif "/Resources" in obj:
+                    visit(obj.Resources)
+
+    for page in pdf.pages:
+        if "/Resources" in page:
+            visit(page["/Resources"])
+    return images
+
+
+def _effective_dpis(pdf: pikepdf.Pdf) -> dict:
+    """Return the lowest effective resolution each image is drawn at, keyed by ``objgen``.
+
+    Content streams are replayed for ``q``, ``Q``, ``cm`` and ``Do`` only,
+    following Form XObjects with their ``/Matrix`` and tiling patterns with
+    theirs. An image fills the unit square of the CTM it is drawn with, so
+    its resolution along each axis is its pixel count over the length of
+    that axis in inches. Images drawn by a stream that cannot be replayed
+    are left out, so their resolution stays unknown.
+    """
+    dpis = {}
+    unknown = set()
+    replayed = set()
+    active = set()
+
+    def enter(obj, resources, ctm):
+        # A form or pattern that draws itself would recurse forever, and the
+        # same one drawn at the same place adds nothing new.
+        key = (obj.objgen, tuple(ctm.shorthand))
+        if obj.objgen in active or key in replayed:
+            return
+        replayed.add(key)
+        active.add(obj.objgen)
+        try:
+            replay(obj, resources, _matrix(obj) @ ctm)
+        finally:
+            active.discard(obj.objgen)
+
+    def replay(content, resources, ctm):
+        try:
+            xobjects = resources["/XObject"] if "/XObject" in resources else {}
+            if "/Pattern" in resources:
+                for _, pattern in resources["/Pattern"].items():
+                    if isinstance(pattern, pikepdf.Stream) and "/Resources" in pattern:
+                        enter(pattern, pattern.Resources, ctm)
+            stack = []
+            for operands, operator in pikepdf.parse_content_stream(content, "q Q cm Do"):
+                if operator == pikepdf.Operator("q"):
+                    stack.append(ctm)
+                elif operator == pikepdf.Operator("Q"):
+                    if stack:
+                        ctm = stack.pop()
+                elif operator == pikepdf.Operator("cm"):
+                    ctm = pikepdf.Matrix(*(float(operand) for operand in operands)) @ ctm
+                elif operands and operands[0] in xobjects:
+                    obj = xobjects[operands[0]]
+                    if "/Subtype" in obj and obj.Subtype == "/Image":
+                        dpi = _placement_dpi(obj, ctm)
+                        if dpi and dpi < dpis.get(obj.objgen, float("inf")):
+                            dpis[obj.objgen] = dpi
+                    elif "/Subtype" in obj and obj.Subtype == "/Form":
+                        # Forms without resources of their own use the ones they are drawn with.
+                        enter(obj, obj.Resources if "/Resources" in obj else resources, ctm)
+        except Exception:
+            unknown.update(_drawable_images(resources))
+
+    for page in pdf.pages:
+        if "/Resources" in page:
+            replay(page, page["/Resources"], pikepdf.Matrix())
+    for objgen in unknown:
+        dpis.pop(objgen, None)
+    return dpis
+
+
+def _drawable_images(resources: pikepdf.Dictionary) -> set:
+    """Return the ``objgen`` of every image ``resources`` can draw, directly or through forms."""
+    images = set()
+    seen = set()
+    pending = [resources]
+    while pending:
+        resources = pending.pop()
+        try:
+            xobjects = resources["/XObject"].items() if "/XObject" in resources else ()
+            for _, obj in xobjects:
+                if obj.objgen in seen:
+                    continue
+                seen.add(obj.objgen)
+                if "/Subtype" in obj and obj.Subtype == "/Image":
+                    images.add(obj.objgen)
+                elif "/Resources" in obj:
+                    pending.append(obj.Resources)
+        except Exception:
+            continue
+    return images
+
+
+def _dpi_scale(dpi: float | None, target_dpi: float | None) -> float:
+    """Return the scale bringing an image drawn at ``dpi`` down to ``target_dpi``, 1.0 if already below."""
+    if not target_dpi or not dpi:
+        return 1.0
+    return min(1.0, target_dpi / dpi)
+
+
+def _sample_indexes(sizes: list, count: int) -> list:
+    """Return up to ``count`` indexes into ``sizes`` spread evenly from smallest to largest."""
+    order = sorted(range(len(sizes)), key=sizes.__getitem__)
+    if len(order) <= count:
+        return order
+    return sorted({order[round(i * (len(order) - 1) / (count - 1))] for i in range(count)})
+
+
+def _first_fitting(estimate, start: int, limit: int) -> int:
+    """Return the first step from ``start`` whose estimate fits ``limit``, else the last step.
+
+    Estimates shrink as steps get harsher, so the search is binary.
+    """
+    low, high = start, len(_TARGET_STEPS) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if estimate(middle) <= limit:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _matrix(obj: pikepdf.Stream) -> pikepdf.Matrix:
+    """Return the ``/Matrix`` of a form or pattern, identity when absent."""
+    return pikepdf.Matrix(obj.Matrix) if "/Matrix" in obj else pikepdf.Matrix()
+
+
+def _placement_dpi(image: pikepdf.Stream, ctm: pikepdf.Matrix) -> float | None:
+    """Return the lower of an image's horizontal and vertical resolution when drawn with ``ctm``."""
+    width = math.hypot(ctm.a, ctm.b) / 72
+    height = math.hypot(ctm.c, ctm.d) / 72
+    if not width or not height:
+        return None
+    return min(int(image.Width) / width, int(image.Height) / height)
+
+
+def _recompress_images(images: list, scales: list, jpeg_quality: int, workers: int, progress_callback) -> list:
+    """Recompress image XObjects in order, each by its scale, on ``workers`` threads when more than one.
+
+    qpdf objects must stay on this thread, so images are opened here and only
+    the PIL images go to the pool. PIL opens JPEG data lazily, leaving its
+    decoding to the workers; other filters are decoded here by qpdf. At most
+    two images per worker are in flight, which bounds memory for large scans.
+    """
+    results = []
+
+    def done(result):
+        results.append(result)
+        if progress_callback:
+            progress_callback(len(results), len(images))
+
+    if workers > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for obj, scale in zip(images, scales, strict=True):
+                pending.append(pool.submit(_recompress_image, _open_image(obj), scale, jpeg_quality))
+                if len(pending) >= 2 * workers:
+                    done(pending.popleft().result())
+            while pending:
+                done(pending.popleft().result())
+    else:
+        for obj, scale in zip(images, scales, strict=True):
+            done(_recompress_image(_open_image(obj), scale, jpeg_quality))
+    return results
+
+
+def _open_image(obj: pikepdf.Object) -> Image.Image | None:
+    """Return the image XObject ``obj`` as a PIL image, or ``None`` if it cannot be read."""
+    try:
+        return pikepdf.PdfImage(obj).as_pil_image()
+    except Exception:
+        return None
+
+
+def _recompress_image(image: Image.Image | None, scale_factor: float, jpeg_quality: int):
+    """Scale and re-encode one image; return ``(data, width, height, encoding)`` or ``None`` on failure.
+
+    ``encoding`` is a key of ``_ENCODINGS``. Colour images become RGB JPEG
+    and effectively gray ones gray JPEG, a third of the samples. Effectively
+    black-and-white ones are thresholded to one bit per pixel, which keeps
+    text edges crisp, and stored as CCITT G4 or Flate, whichever is smaller.
+
+    ``image`` must not have been loaded yet for JPEG draft decoding to apply.
+    """
+    if image is None:
+        return None
+    try:
+        if scale_factor < 1.0:
+            new_width = int(image.width * scale_factor)
+            new_height = int(image.height * scale_factor)
+            if scale_factor <= 0.5 and image.format == "JPEG":
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale, no smaller than
+                # the target, so the full bitmap is never built and LANCZOS
+                # only resamples the remaining factor.
+                image.draft(image.mode, (new_width, new_height))
+            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+        image, encoding = _classify_image(image)
+        if encoding == "bilevel":
+            data, encoding = _encode_bilevel(image.convert("1", dither=Image.Dither.NONE))
+            return data, image.width, image.height, encoding
+
+        img_bytes = io.BytesIO()
+        image.save(img_bytes, format='JPEG', quality=jpeg_quality, optimize=True)
+        return img_bytes.getvalue(), image.width, image.height, encoding
+    except Exception:
+        return None
+
+
+def _classify_image(image: Image.Image) -> tuple[Image.Image, str]:
+    """Return ``image`` as RGB with "rgb", or as gray with "gray" or "bilevel".
+
+    Both tests run on histograms, so the per-pixel work stays in Pillow's C
+    code: the largest difference between any two channels shows colour, and
+    the share of midtones separates scans of black-and-white pages.
+    """
+    if image.mode == "1":
+        return image, "bilevel"
+    if image.mode != "L":
+        image = image.convert("RGB")
+        red, green, blue = image.split()
+        chroma = ImageChops.lighter(
+            ImageChops.lighter(ImageChops.difference(red, green), ImageChops.difference(green, blue)),
+            ImageChops.difference(red, blue),
+        )
+        if sum(chroma.histogram()[_GRAY_TOLERANCE + 1:]) > _COLOR_SHARE * image.width * image.height:
+            return image, "rgb"
+    image = image.convert("L")
+    histogram = image.histogram()
+    pixels = image.width * image.height
+    dark, midtones, light = sum(histogram[:_DARK]), sum(histogram[_DARK:_LIGHT + 1]), sum(histogram[_LIGHT + 1:])
+    if min(dark, light) >= _TONE_SHARE * pixels and midtones <= min(_MIDTONE_SHARE * pixels, dark):
+        return image, "bilevel"
+    return image, "gray"
+
+
+def _encode_bilevel(image: Image.Image) -> tuple[bytes, str]:
+    """Encode a one-bit image as CCITT G4 or Flate, whichever is smaller; return ``(data, encoding)``.
+
+    Pillow's G4 encoder writes TIFF, so the data is taken from its single
+    strip. Without libtiff only Flate is tried. Mode "1" packs rows the way
+    /DeviceGray with one bit per component expects, with 1 for white.
+    """
+    candidates = [(zlib.compress(image.tobytes(), 9), "flate")]
+    try:
+        tiff = io.BytesIO()
+        image.save(tiff, format="TIFF", compression="group4", tiffinfo={278: image.height})
+        with Image.open(tiff) as encoded:
+            offset, length = encoded.tag_v2[273][0], encoded.tag_v2[279][0]
+        candidates.append((tiff.getvalue()[offset:offset + length], "ccitt"))
+    except Exception:
+        pass
+    return min(candidates, key=lambda candidate: len(candidate[0]))
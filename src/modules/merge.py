@@ -1,10 +1,469 @@
+import gc
+import hashlib
+import io
 import os
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import pikepdf
 from pypdf import PdfWriter, PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+from src.modules.pdf_utils import dedupe_objects, get_page_count
+
+# Source bytes the streaming merge may hold before forcing a garbage collection.
+_GC_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Bytes copied at a time when a parallel merge joins its fragments.
+_FRAGMENT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Bytes read from each end of a file when probing for the header and trailer.
+_PROBE_BYTES = 1024
+
+# Output optimization profiles for ``Merger.process(optimize=...)``.
+_OUTPUT_PROFILES = {
+    "fast": {"object_streams": True, "recompress": False, "linearize": False},
+    "small": {"object_streams": True, "recompress": True, "linearize": False},
+    "web": {"object_streams": True, "recompress": True, "linearize": True},
+}
+
+# Width of an object number inside a fragment reference; fixed so that the
+# final pass can read each number at its recorded position before writing
+# it back in compact form.
+_REF_WIDTH = 10
+
+
+# Page attributes a page inherits from its page tree ancestors, with the
+# value a page that has none of its own falls back to; ``None`` for /CropBox
+# means the page's own /MediaBox.
+_INHERITABLE_DEFAULTS = {
+    "/Resources": b"<< >>",
+    "/MediaBox": b"[ 0 0 612 792 ]",
+    "/CropBox": None,
+    "/Rotate": b"0",
+}
+
+
+class MergeCancelled(Exception):
+    """Raised by ``Merger.process`` when the merge was stopped with ``Merger.cancel``."""
+
+
+class _ObjectBuffer(io.BytesIO):
+    """Serialized body of one output object, remembering where its references are."""
+
+    def __init__(self, fixed_refs: bool):
+        super().__init__()
+        self.fixed_refs = fixed_refs
+        self.refs = []
+
+    def write_ref(self, num: int):
+        if self.fixed_refs:
+            self.refs.append(self.tell())
+            self.write(f"{num:0{_REF_WIDTH}d} 0 R".encode())
+        else:
+            self.write(f"{num} 0 R".encode())
+
+
+class _StreamingWriter:
+    """Write merged pages straight to disk, one source document at a time.
+
+    Every object reachable from a copied page is renumbered and serialized as
+    soon as it is reached, so only the xref offsets stay in memory. With
+    ``dedupe`` enabled, streams are written after their dependencies and keyed
+    by a content hash, so identical images, fonts and forms coming from
+    different inputs are written once.
+
+    In ``fragment`` mode no page tree, catalog or xref is written. Object
+    headers and references get fixed-width numbers whose positions are recorded
+    instead, so a later writer can splice the fragment in with ``append_fragment``.
+
+    With ``update`` (see ``_read_update_base``) the stream is positioned at the
+    end of an existing PDF and the pages are written as an incremental update:
+    new objects are numbered after the existing ones, and ``close`` rewrites
+    only the page tree root and adds an xref section chained to the old one.
+    """
+
+    def __init__(self, stream, dedupe: bool = False, fragment: bool = False, update: dict | None = None):
+        self.stream = stream
+        self.dedupe = dedupe
+        self.fragment = fragment
+        self.duplicates = 0
+        self.bytes_saved = 0
+        self._digests = {}
+        self._in_progress = set()
+        # Offset of every object by number; slot 0 is the free-list head.
+        self.offsets = array("Q", [0])
+        self.kids = array("Q")
+        self.ref_positions = array("Q")
+        self.update = update
+        # Attributes the existing page tree root would pass on to appended pages.
+        self.inherited = update["inherited"] if update else ()
+        if fragment:
+            # Number 0 stands for the page tree root of whichever file the fragment ends up in.
+            self.pages_num = 0
+            self.body_start = self.stream.tell()
+        elif update:
+            # Numbers below the old /Size belong to the existing file and keep a zero offset.
+            self.offsets = array("Q", [0]) * update["size"]
+            self.pages_num = update["pages_num"]
+        else:
+            self.catalog_num = self._allocate()
+            self.pages_num = self._allocate()
+            self.stream.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def _allocate(self) -> int:
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def _write_object(self, num: int, buffer: _ObjectBuffer):
+        offset = self.stream.tell()
+        self.offsets[num] = offset
+        if self.fragment:
+            header = f"{num:0{_REF_WIDTH}d} 0 obj\n".encode()
+            self.ref_positions.append(offset)
+        else:
+            header = f"{num} 0 obj\n".encode()
+        self.ref_positions.extend(offset + len(header) + position for position in buffer.refs)
+        self.stream.write(header)
+        self.stream.write(buffer.getvalue())
+        self.stream.write(b"\nendobj\n")
+
+    def append(self, reader: PdfReader, on_page=None, pages: list | None = None, mapping: dict | None = None) -> int:
+        """Copy ``pages`` of ``reader`` (all by default) and return the number of pages written.
+
+        ``on_page(page_number, page_count)`` is called after each page is written.
+        Passing the same ``mapping`` for several calls on one reader shares the
+        objects already copied, so fonts and images are written once.
+        """
+        if pages is None:
+            pages = list(reader.pages)
+        if mapping is None:
+            mapping = {}
+        # Pages are numbered up front so links between them resolve to the copies;
+        # a page taken twice is linked to its first copy.
+        nums = []
+        for page in pages:
+            ref = page.indirect_reference
+            nums.append(self._allocate())
+            mapping.setdefault((ref.idnum, ref.generation), nums[-1])
+
+        for page_number, (page, num) in enumerate(zip(pages, nums, strict=True), start=1):
+            buffer = _ObjectBuffer(self.fragment)
+            buffer.write(b"<<\n")
+            for key, value in page.items():
+                if key in ("/Parent", "/StructParents"):
+                    continue
+                key.write_to_stream(buffer)
+                buffer.write(b" ")
+                self._serialize(value, buffer, reader, mapping)
+                buffer.write(b"\n")
+            # reader.pages already carries attributes inherited in the source,
+            # so a missing one must be pinned to its default here.
+            for key in self.inherited:
+                if key in page:
+                    continue
+                buffer.write(f"{key} ".encode())
+                default = _INHERITABLE_DEFAULTS[key]
+                if default is None and "/MediaBox" in page:
+                    self._serialize(page.raw_get("/MediaBox"), buffer, reader, mapping)
+                else:
+                    buffer.write(default or _INHERITABLE_DEFAULTS["/MediaBox"])
+                buffer.write(b"\n")
+            buffer.write(b"/Parent ")
+            buffer.write_ref(self.pages_num)
+            buffer.write(b"\n>>")
+            self._write_object(num, buffer)
+            self.kids.append(num)
+            if on_page:
+                on_page(page_number, len(pages))
+
+        return len(pages)
+
+    def _copy(self, ref: IndirectObject, reader: PdfReader, mapping: dict):
+        """Return the output object number for ``ref``, copying it on first use."""
+        key = (ref.idnum, ref.generation)
+        if key in mapping:
+            return mapping[key]
+
+        if key in self._in_progress:
+            # A stream that refers back to itself can only be numbered up front.
+            mapping[key] = self._allocate()
+            return mapping[key]
+
+        obj = reader.get_object(ref)
+        if isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Page", "/Pages"):
+            # A page that is not part of the merge, e.g. the target of a link.
+            return None
+
+        if self.dedupe and isinstance(obj, StreamObject):
+            return self._copy_stream(key, obj, reader, mapping)
+
+        num = self._allocate()
+        mapping[key] = num
+        buffer = _ObjectBuffer(self.fragment)
+        self._serialize(obj, buffer, reader, mapping)
+        self._write_object(num, buffer)
+        return num
+
+    def _copy_stream(self, key: tuple, obj: StreamObject, reader: PdfReader, mapping: dict):
+        self._in_progress.add(key)
+        buffer = _ObjectBuffer(self.fragment)
+        self._serialize(obj, buffer, reader, mapping)
+        self._in_progress.discard(key)
+
+        if key in mapping:
+            self._write_object(mapping[key], buffer)
+            return mapping[key]
+
+        # References inside the buffer are already renumbered and deduplicated,
+        # so equal bytes mean an equal object in the output.
+        digest = hashlib.sha256(buffer.getbuffer()).digest()
+        num = self._digests.get(digest)
+        if num is None:
+            num = self._allocate()
+            self._digests[digest] = num
+            self._write_object(num, buffer)
+        else:
+            self.duplicates += 1
+            self.bytes_saved += buffer.tell()
+        mapping[key] = num
+        return num
+
+    def _serialize(self, obj, buffer: _ObjectBuffer, reader: PdfReader, mapping: dict):
+        if isinstance(obj, IndirectObject):
+            num = self._copy(obj, reader, mapping)
+            if num is None:
+                buffer.write(b"null")
+            else:
+                buffer.write_ref(num)
+        elif isinstance(obj, DictionaryObject):
+            buffer.write(b"<<\n")
+            for key, value in obj.items():
+                if isinstance(obj, StreamObject) and key == "/Length":
+                    continue
+                key.write_to_stream(buffer)
+                buffer.write(b" ")
+                self._serialize(value, buffer, reader, mapping)
+                buffer.write(b"\n")
+            if isinstance(obj, StreamObject):
+                buffer.write(f"/Length {len(obj._data)}\n>>\nstream\n".encode())
+                buffer.write(obj._data)
+                buffer.write(b"\nendstream")
+            else:
+                buffer.write(b">>")
+        elif isinstance(obj, ArrayObject):
+            buffer.write(b"[")
+            for item in obj:
+                buffer.write(b" ")
+                self._serialize(item, buffer, reader, mapping)
+            buffer.write(b" ]")
+        elif obj is None:
+            buffer.write(b"null")
+        else:
+            obj.write_to_stream(buffer)
+
+    def finish_fragment(self) -> dict:
+        """Describe a fragment written in ``fragment`` mode for ``append_fragment``."""
+        return {
+            "body_start": self.body_start,
+            "body_end": self.stream.tell(),
+            "offsets": self.offsets,
+            "kids": self.kids,
+            "ref_positions": self.ref_positions,
+            "duplicates_removed": self.duplicates,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def append_fragment(self, path: str, fragment: dict) -> int:
+        """Splice a fragment file in, renumbering its objects and compacting its references."""
+        base = len(self.offsets) - 1
+        self.offsets.extend(fragment["offsets"][1:])
+        self.kids.extend(kid + base for kid in fragment["kids"])
+        # Object headers are references too; map their positions back to object numbers.
+        headers = {offset: num + base for num, offset in enumerate(fragment["offsets"]) if num}
+
+        refs = fragment["ref_positions"]
+        next_ref = 0
+        with open(path, "rb") as source:
+            position = fragment["body_start"]
+            source.seek(position)
+            while position < fragment["body_end"]:
+                end = min(position + _FRAGMENT_CHUNK_BYTES, fragment["body_end"])
+                # Never cut a reference in half at the chunk boundary.
+                last = bisect_left(refs, end) - 1
+                if last >= next_ref and refs[last] + _REF_WIDTH > end:
+                    end = refs[last] if refs[last] > position else refs[last] + _REF_WIDTH
+                chunk = source.read(end - position)
+                written = self.stream.tell()
+                cursor = 0
+                while next_ref < len(refs) and refs[next_ref] < end:
+                    start = refs[next_ref] - position
+                    written += self.stream.write(chunk[cursor:start])
+                    if refs[next_ref] in headers:
+                        self.offsets[headers[refs[next_ref]]] = written
+                    num = int(chunk[start:start + _REF_WIDTH])
+                    num = self.pages_num if num == 0 else num + base
+                    written += self.stream.write(str(num).encode())
+                    cursor = start + _REF_WIDTH
+                    next_ref += 1
+                self.stream.write(chunk[cursor:])
+                position = end
+
+        return len(fragment["kids"])
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer."""
+        if self.update:
+            self._close_update()
+            return
+
+        kids = " ".join(f"{num} 0 R" for num in self.kids)
+        pages = _ObjectBuffer(False)
+        pages.write(f"<<\n/Type /Pages\n/Count {len(self.kids)}\n/Kids [ {kids} ]\n>>".encode())
+        self._write_object(self.pages_num, pages)
+        catalog = _ObjectBuffer(False)
+        catalog.write(f"<<\n/Type /Catalog\n/Pages {self.pages_num} 0 R\n>>".encode())
+        self._write_object(self.catalog_num, catalog)
+
+        xref_offset = self.stream.tell()
+        size = len(self.offsets)
+        self.stream.write(f"xref\n0 {size}\n".encode())
+        self.stream.write(b"0000000000 65535 f\r\n")
+        for num in range(1, size):
+            self.stream.write(f"{self.offsets[num]:010d} 00000 n\r\n".encode())
+        self.stream.write(f"trailer\n<<\n/Size {size}\n/Root {self.catalog_num} 0 R\n>>\n".encode())
+        self.stream.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def _close_update(self):
+        """Write the new page tree root and an xref section covering only what changed."""
+        update = self.update
+        kids = " ".join([*update["kids"], *(f"{num} 0 R" for num in self.kids)])
+        pages = _ObjectBuffer(False)
+        pages.write(b"<<\n")
+        pages.write(update["pages_entries"])
+        pages.write(f"/Type /Pages\n/Count {update['count'] + len(self.kids)}\n/Kids [ {kids} ]\n>>".encode())
+        self._write_object(self.pages_num, pages)
+
+        xref_offset = self.stream.tell()
+        first_new = update["size"]
+        size = len(self.offsets)
+        # Repeating the free-list head keeps the section zero-indexed, as readers expect.
+        self.stream.write(b"xref\n0 1\n0000000000 65535 f\r\n")
+        self.stream.write(f"{self.pages_num} 1\n{self.offsets[self.pages_num]:010d} 00000 n\r\n".encode())
+        if size > first_new:
+            self.stream.write(f"{first_new} {size - first_new}\n".encode())
+            for num in range(first_new, size):
+                self.stream.write(f"{self.offsets[num]:010d} 00000 n\r\n".encode())
+        self.stream.write(f"trailer\n<<\n/Size {size}\n/Root {update['root']}\n".encode())
+        self.stream.write(update["trailer_entries"])
+        self.stream.write(f"/Prev {update['prev']}\n>>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def _read_update_base(path: str) -> dict:
+    """Collect what an incremental update of ``path`` needs from its last revision.
+
+    Only the trailer and the page tree root are resolved, so the cost does not
+    grow with the size of the page content already in the file.
+    """
+    with open(path, "rb") as stream:
+        reader = PdfReader(stream, strict=False)
+        if reader.is_encrypted:
+            raise ValueError(f"Cannot append to encrypted PDF: {path}")
+
+        trailer = reader.trailer
+        root_ref = trailer.raw_get("/Root")
+        pages_ref = trailer["/Root"].raw_get("/Pages")
+        if not isinstance(pages_ref, IndirectObject) or pages_ref.generation != 0:
+            raise ValueError(f"Cannot append to {path}: unsupported page tree")
+        pages = pages_ref.get_object()
+
+        pages_entries = io.BytesIO()
+        for key, value in pages.items():
+            if key in ("/Type", "/Count", "/Kids"):
+                continue
+            key.write_to_stream(pages_entries)
+            pages_entries.write(b" ")
+            value.write_to_stream(pages_entries)
+            pages_entries.write(b"\n")
+
+        trailer_entries = io.BytesIO()
+        for key in ("/Info", "/ID"):
+            if key in trailer:
+                key_name = NameObject(key)
+                key_name.write_to_stream(trailer_entries)
+                trailer_entries.write(b" ")
+                trailer.raw_get(key).write_to_stream(trailer_entries)
+                trailer_entries.write(b"\n")
+
+        # The xref section this update chains to is the one the file currently ends with.
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(max(size - _PROBE_BYTES, 0))
+        tail = stream.read()
+        start = tail.rindex(b"startxref") + len(b"startxref")
+
+        return {
+            "size": int(trailer["/Size"]),
+            "root": f"{root_ref.idnum} {root_ref.generation} R",
+            "pages_num": pages_ref.idnum,
+            "pages_entries": pages_entries.getvalue(),
+            "inherited": [key for key in _INHERITABLE_DEFAULTS if key in pages],
+            "kids": [f"{kid.idnum} {kid.generation} R" for kid in pages["/Kids"]],
+            "count": int(pages["/Count"]),
+            "trailer_entries": trailer_entries.getvalue(),
+            "prev": int(tail[start:].split()[0]),
+        }
+
+
+@contextmanager
+def _atomic_output(output_file: str):
+    """Yield a binary stream that replaces ``output_file`` only on success.
+
+    The data goes to a temporary file beside the destination, so a failed merge
+    never leaves a truncated file behind and the output may be one of the inputs.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=output_dir)
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            yield stream
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _normalize_entries(input_files: list) -> list[tuple[str, list[int] | None]]:
+    """Turn merge inputs into ``(path, page_indexes)`` pairs; ``None`` means every page."""
+    entries = []
+    for entry in input_files:
+        if isinstance(entry, str):
+            entries.append((entry, None))
+        else:
+            path, pages = entry
+            entries.append((path, None if pages is None else list(pages)))
+    return entries
+
+
+def _select_pages(reader: PdfReader, pdf: str, pages: list[int] | None) -> list:
+    if pages is None:
+        return list(reader.pages)
+    total = len(reader.pages)
+    for index in pages:
+        if not 0 <= index < total:
+            raise ValueError(f"Page {index + 1} is out of range for {pdf} ({total} pages)")
+    return [reader.pages[index] for index in pages]
 
 
 class Merger:
     def __init__(self):
         self.engine = PdfWriter()
+        self._cancel_event = threading.Event()
 
     def __enter__(self):
         return self
@@ -12,23 +471,408 @@ class Merger:
     def __exit__(self, exc_type, exc_value, traceback):
         self.engine.close()
 
-    def process(self, input_files: list[str], output_file: str = "merged.pdf"):
+    def cancel(self):
+        """Ask a running ``process`` call to stop; safe to call from another thread.
+
+        The merge stops after the page being copied and raises ``MergeCancelled``,
+        leaving no output file behind. The next ``process`` call starts afresh.
+        """
+        self._cancel_event.set()
+
+    @staticmethod
+    def _check_input(pdf: str):
+        if not pdf.lower().endswith('.pdf'):
+            raise ValueError(f"Invalid file type: {pdf}. Only PDF files are supported.")
+
+        if not os.path.exists(pdf):
+            raise FileNotFoundError(f"File not found: {pdf}")
+
+    @staticmethod
+    def probe(input_files: list[str], workers: int | None = None) -> list[dict]:
+        """Check every input concurrently before anything is copied.
+
+        Args:
+            input_files: Paths of the PDFs to merge
+            workers: Number of threads; defaults to the executor's own choice
+
+        Returns:
+            One dict per input, in order, with path, status ("ok", "missing",
+            "invalid", "encrypted" or "corrupt"), size, page_count, encrypted,
+            header_ok, xref_ok and error
+        """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_probe_input, input_files))
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise MergeCancelled("Merge cancelled")
+
+    def _reporter(self, total_files: int, progress_callback):
+        """Return a ``report(file_number, page_number, page_count)`` hook that also checks for cancellation."""
+        def report(file_number: int, page_number: int, page_count: int):
+            self._check_cancelled()
+            if progress_callback:
+                progress_callback(file_number, total_files, page_number, page_count)
+
+        return report
+
+    def process(
+        self,
+        input_files: list[str | tuple[str, list[int]]],
+        output_file: str = "merged.pdf",
+        streaming: bool = False,
+        dedupe: bool = False,
+        workers: int = 1,
+        progress_callback=None,
+        append: bool = False,
+        optimize: str | None = None,
+    ) -> dict:
+        """Merge ``input_files`` into ``output_file``.
+
+        Args:
+            input_files: PDFs to merge, in order. Each entry is a path, or a
+                ``(path, page_indexes)`` pair taking only those 0-based pages in
+                that order; a path used by several entries is parsed once and
+                its fonts and images are shared between them
+            output_file: Path to save the merged PDF
+            streaming: Write each input to disk as soon as it is read instead of
+                building the whole document in memory; peak memory then stays
+                flat regardless of how many inputs there are
+            dedupe: Write identical streams (images, fonts, form XObjects, ICC
+                profiles) only once and point every reference at that copy
+            workers: Number of processes. Above 1, contiguous chunks of the input
+                list are streamed in parallel and joined in order by a final pass
+                that only copies bytes; ``dedupe`` then applies within each chunk
+            progress_callback: Optional ``callback(file_number, total_files,
+                page_number, page_count)`` called when an entry is started (with
+                page 0) and after each of its pages is copied. With ``workers``
+                above 1 it is called once per finished chunk, without page counts
+            append: If ``output_file`` already exists, add the pages after its
+                own as a PDF incremental update instead of rewriting it; only the
+                new objects, the page tree root and an xref section are written.
+                Always streams in a single process
+            optimize: Optional output profile from ``get_output_profiles``. The
+                merge is written to a temporary file and rewritten once into
+                ``output_file`` with object streams and recompressed streams,
+                dropping objects nothing refers to; "web" also linearizes.
+                Cannot be combined with ``append``
+
+        Returns:
+            dict with page_count, output_size, duplicates_removed, bytes_saved,
+            unoptimized_size and timings (seconds per phase)
+
+        Raises:
+            MergeCancelled: ``cancel`` was called; no output file is written
+        """
+        self._cancel_event.clear()
         if not input_files:
             raise ValueError("No input files provided for merging")
 
-        for pdf in input_files:
-            if not pdf.lower().endswith('.pdf'):
-                raise ValueError(f"Invalid file type: {pdf}. Only PDF files are supported.")
-            
-            if not os.path.exists(pdf):
-                raise FileNotFoundError(f"File not found: {pdf}")
-            
+        if optimize is not None and optimize not in _OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {optimize}")
+        if optimize and append:
+            raise ValueError("An output profile cannot be applied to an appended merge")
+
+        entries = _normalize_entries(input_files)
+        report = self._reporter(len(entries), progress_callback)
+        timings = {}
+
+        if not optimize:
+            start = time.perf_counter()
+            stats = self._merge(entries, output_file, streaming, dedupe, workers, append, report)
+            timings["merge"] = time.perf_counter() - start
+            return {**stats, "unoptimized_size": stats["output_size"], "timings": timings}
+
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        fd, raw_path = tempfile.mkstemp(suffix=".part", dir=output_dir)
+        os.close(fd)
+        try:
+            start = time.perf_counter()
+            stats = self._merge(entries, raw_path, streaming, dedupe, workers, False, report)
+            timings["merge"] = time.perf_counter() - start
+            self._check_cancelled()
+            _optimize_output(raw_path, output_file, _OUTPUT_PROFILES[optimize], timings)
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+
+        return {
+            **stats,
+            "output_size": os.path.getsize(output_file),
+            "unoptimized_size": stats["output_size"],
+            "timings": timings,
+        }
+
+    @staticmethod
+    def get_output_profiles():
+        """Get available output optimization profiles."""
+        return list(_OUTPUT_PROFILES)
+
+    def _merge(
+        self, entries: list[tuple], output_file: str, streaming: bool, dedupe: bool, workers: int, append: bool, report
+    ) -> dict:
+        if append and os.path.exists(output_file):
+            return self._process_append(entries, output_file, dedupe, report)
+
+        if workers > 1 and len(entries) > 1:
+            return self._process_parallel(entries, output_file, dedupe, workers, report)
+
+        if streaming:
+            return self._process_streaming(entries, output_file, dedupe, report)
+
+        readers = {}
+        for file_number, (pdf, indexes) in enumerate(entries, start=1):
+            self._check_input(pdf)
+
             try:
-                # Try to read and append with non-strict mode for better compatibility
-                reader = PdfReader(pdf, strict=False)
-                for page in reader.pages:
+                if pdf not in readers:
+                    # Try to read and append with non-strict mode for better compatibility
+                    readers[pdf] = PdfReader(pdf, strict=False)
+                pages = _select_pages(readers[pdf], pdf, indexes)
+                report(file_number, 0, len(pages))
+                for page_number, page in enumerate(pages, start=1):
                     self.engine.add_page(page)
+                    report(file_number, page_number, len(pages))
+            except MergeCancelled:
+                # Drop the pages copied so far, so that the next process call starts without them.
+                self.engine.close()
+                self.engine = PdfWriter()
+                raise
             except Exception as e:
                 raise ValueError(f"Cannot process PDF file: {pdf}. Error: {str(e)}") from e
 
-        self.engine.write(output_file)
+        duplicates, bytes_saved = self._dedupe_streams() if dedupe else (0, 0)
+        with _atomic_output(output_file) as stream:
+            self.engine.write(stream)
+
+        return {
+            "page_count": len(self.engine.pages),
+            "output_size": os.path.getsize(output_file),
+            "duplicates_removed": duplicates,
+            "bytes_saved": bytes_saved,
+        }
+
+    def _dedupe_streams(self) -> tuple[int, int]:
+        """Drop streams whose bytes match an earlier one and rewire references to them."""
+        objects = self.engine._objects
+        sizes = {}
+
+        def candidates():
+            return ((idnum, obj) for idnum, obj in enumerate(objects, start=1) if isinstance(obj, StreamObject))
+
+        def key(idnum, obj):
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer)
+            sizes[idnum] = buffer.tell()
+            return hashlib.sha256(buffer.getvalue()).digest()
+
+        def rewire(replaced):
+            for idnum in replaced:
+                objects[idnum - 1] = None
+            for obj in objects:
+                if isinstance(obj, (DictionaryObject, ArrayObject)):
+                    self._rewire(obj, replaced)
+
+        dropped = dedupe_objects(candidates, key, rewire)
+        return len(dropped), sum(sizes[idnum] for idnum in dropped)
+
+    def _rewire(self, obj, replaced: dict):
+        items = obj.items() if isinstance(obj, DictionaryObject) else enumerate(obj)
+        for key, value in list(items):
+            if isinstance(value, IndirectObject):
+                if value.idnum in replaced:
+                    obj[key] = IndirectObject(replaced[value.idnum], 0, self.engine)
+            elif isinstance(value, (DictionaryObject, ArrayObject)):
+                self._rewire(value, replaced)
+
+    def _process_streaming(self, entries: list[tuple], output_file: str, dedupe: bool, report) -> dict:
+        with _atomic_output(output_file) as stream:
+            writer = _StreamingWriter(stream, dedupe=dedupe)
+            _stream_inputs(writer, entries, report)
+            writer.close()
+
+        return {
+            "page_count": len(writer.kids),
+            "output_size": os.path.getsize(output_file),
+            "duplicates_removed": writer.duplicates,
+            "bytes_saved": writer.bytes_saved,
+        }
+
+    def _process_append(self, entries: list[tuple], output_file: str, dedupe: bool, report) -> dict:
+        target = os.path.abspath(output_file)
+        if any(os.path.abspath(pdf) == target for pdf, _ in entries):
+            raise ValueError(f"Cannot append {output_file} to itself")
+
+        update = _read_update_base(output_file)
+        with open(output_file, "r+b") as stream:
+            original_size = stream.seek(0, os.SEEK_END)
+            try:
+                stream.seek(original_size - 1)
+                if stream.read(1) not in (b"\n", b"\r"):
+                    stream.write(b"\n")
+                writer = _StreamingWriter(stream, dedupe=dedupe, update=update)
+                _stream_inputs(writer, entries, report)
+                writer.close()
+            except BaseException:
+                # Drop the half-written section; the previous revision is untouched.
+                stream.truncate(original_size)
+                raise
+
+        return {
+            "page_count": update["count"] + len(writer.kids),
+            "output_size": os.path.getsize(output_file),
+            "duplicates_removed": writer.duplicates,
+            "bytes_saved": writer.bytes_saved,
+        }
+
+    def _process_parallel(self, entries: list[tuple], output_file: str, dedupe: bool, workers: int, report) -> dict:
+        for pdf, _ in entries:
+            self._check_input(pdf)
+
+        chunk_size = -(-len(entries) // workers)
+        chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+            paths = [os.path.join(tmp_dir, f"part_{i}.bin") for i in range(len(chunks))]
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                futures = [
+                    pool.submit(_merge_chunk, chunk, path, dedupe) for chunk, path in zip(chunks, paths, strict=True)
+                ]
+                fragments = []
+                files_done = 0
+                try:
+                    for chunk, future in zip(chunks, futures, strict=True):
+                        fragments.append(future.result())
+                        files_done += len(chunk)
+                        report(files_done, 0, 0)
+                except BaseException:
+                    pool.shutdown(cancel_futures=True)
+                    raise
+
+            with _atomic_output(output_file) as stream:
+                writer = _StreamingWriter(stream)
+                for path, fragment in zip(paths, fragments, strict=True):
+                    self._check_cancelled()
+                    writer.append_fragment(path, fragment)
+                writer.close()
+
+        return {
+            "page_count": len(writer.kids),
+            "output_size": os.path.getsize(output_file),
+            "duplicates_removed": sum(fragment["duplicates_removed"] for fragment in fragments),
+            "bytes_saved": sum(fragment["bytes_saved"] for fragment in fragments),
+        }
+
+
+def _optimize_output(source: str, output_file: str, profile: dict, timings: dict):
+    """Rewrite the merged ``source`` into ``output_file`` according to ``profile``."""
+    start = time.perf_counter()
+    with pikepdf.open(source) as pdf:
+        timings["optimize_open"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with _atomic_output(output_file) as stream:
+            # Objects no longer reachable from the trailer are never written.
+            pdf.save(
+                stream,
+                compress_streams=True,
+                recompress_flate=profile["recompress"],
+                stream_decode_level=pikepdf.StreamDecodeLevel.generalized if profile["recompress"] else None,
+                object_stream_mode=(
+                    pikepdf.ObjectStreamMode.generate if profile["object_streams"] else pikepdf.ObjectStreamMode.preserve
+                ),
+                linearize=profile["linearize"],
+            )
+        timings["optimize_write"] = time.perf_counter() - start
+
+
+def _stream_inputs(writer: _StreamingWriter, entries: list[tuple], report=None):
+    """Append each ``(path, page_indexes)`` entry to ``writer``.
+
+    A reader stays open only until the last entry that uses its path, and the
+    objects copied from it are shared by all of those entries.
+    ``report(file_number, page_number, page_count)`` is called as each entry is
+    started and after each of its pages is written.
+    """
+    last_use = {pdf: index for index, (pdf, _) in enumerate(entries)}
+    open_readers = {}
+    unreleased = 0
+    for index, (pdf, indexes) in enumerate(entries):
+        Merger._check_input(pdf)
+
+        try:
+            if pdf not in open_readers:
+                open_readers[pdf] = (PdfReader(pdf, strict=False), {})
+            reader, mapping = open_readers[pdf]
+            pages = _select_pages(reader, pdf, indexes)
+            on_page = None
+            if report:
+                report(index + 1, 0, len(pages))
+                on_page = partial(report, index + 1)
+            writer.append(reader, on_page, pages, mapping)
+        except MergeCancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"Cannot process PDF file: {pdf}. Error: {str(e)}") from e
+        del reader, mapping, pages
+
+        if last_use[pdf] != index:
+            continue
+        del open_readers[pdf]
+
+        # pypdf readers are reference cycles that only a full collection
+        # frees; force one once enough source bytes are pending.
+        unreleased += os.path.getsize(pdf)
+        if unreleased >= _GC_THRESHOLD_BYTES:
+            gc.collect()
+            unreleased = 0
+
+
+def _merge_chunk(entries: list[tuple], fragment_path: str, dedupe: bool) -> dict:
+    """Stream one contiguous chunk of a parallel merge into a fragment file."""
+    with open(fragment_path, "wb") as stream:
+        writer = _StreamingWriter(stream, dedupe=dedupe, fragment=True)
+        _stream_inputs(writer, entries)
+        return writer.finish_fragment()
+
+
+def _probe_input(pdf: str) -> dict:
+    """Pre-flight report for one merge input; never raises."""
+    report = {
+        "path": pdf,
+        "status": "ok",
+        "size": 0,
+        "page_count": 0,
+        "encrypted": False,
+        "header_ok": False,
+        "xref_ok": False,
+        "error": "",
+    }
+    try:
+        Merger._check_input(pdf)
+    except FileNotFoundError as e:
+        return {**report, "status": "missing", "error": str(e)}
+    except ValueError as e:
+        return {**report, "status": "invalid", "error": str(e)}
+
+    try:
+        report["size"] = os.path.getsize(pdf)
+        with open(pdf, "rb") as f:
+            report["header_ok"] = b"%PDF-" in f.read(_PROBE_BYTES)
+            f.seek(max(report["size"] - _PROBE_BYTES, 0))
+            tail = f.read()
+        report["xref_ok"] = b"startxref" in tail and b"%%EOF" in tail
+        if not report["header_ok"]:
+            return {**report, "status": "corrupt", "error": "Missing %PDF header"}
+
+        # A broken xref is rebuilt by the non-strict reader, just as the merge would.
+        reader = PdfReader(pdf, strict=False)
+        report["encrypted"] = reader.is_encrypted
+        if reader.is_encrypted and not reader.decrypt(""):
+            return {**report, "status": "encrypted", "error": "Password required"}
+        report["page_count"] = get_page_count(reader)
+    except Exception as e:
+        return {**report, "status": "corrupt", "error": str(e)}
+
+    return report
@@ -55,3 +55,40 @@ def get_pdf_info(file_path):
     except:
         reader = PdfReader(file_path, strict=False)
         return {'total_pages': len(reader.pages)}
+
+
+def get_page_count(reader: PdfReader) -> int:
+    """Number of pages, taken from the page tree's /Count without loading the pages.
+
+    Falls back to counting the pages when /Count is missing or not a valid number.
+    """
+    pages = reader.root_object.get("/Pages")
+    count = pages.get_object().get("/Count") if pages is not None else None
+    return count if isinstance(count, int) and count >= 0 else len(reader.pages)
+
+
+def dedupe_objects(candidates, key, rewire):
+    """Map each duplicate object to the first one with the same key, until none are left.
+
+    ``candidates()`` yields ``(object_id, obj)`` pairs, ``key(object_id, obj)``
+    returns what makes two objects interchangeable and ``rewire(replaced)``
+    points references to each dropped id at the id it maps to. Rewiring can
+    make the objects that refer to dropped ones identical in turn, so passes
+    repeat until one finds nothing. Returns the mapping of every dropped id.
+    """
+    dropped = {}
+    while True:
+        seen = {}
+        replaced = {}
+        for object_id, obj in candidates():
+            if object_id in dropped:
+                continue
+            object_key = key(object_id, obj)
+            if object_key in seen:
+                replaced[object_id] = seen[object_key]
+            else:
+                seen[object_key] = object_id
+        if not replaced:
+            return dropped
+        dropped.update(replaced)
+        rewire(replaced)
@@ -1,4 +1,97 @@
-from pypdf import PdfReader, PdfWriter
+import io
+import mmap
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+import pikepdf
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+from src.modules.pdf_utils import get_page_count
+
+# A name token in a content stream, e.g. the /F1 of "/F1 12 Tf".
+_NAME_TOKEN = re.compile(rb"/([^\s/\[\]()<>{}%]+)")
+
+# Bytes an object adds to a part beyond its body: its "obj"/"endobj" lines and xref entry.
+_OBJECT_OVERHEAD = 40
+
+# Bytes a page adds to its part's page tree as an entry of /Kids.
+_KIDS_ENTRY = 8
+
+# Bytes every part needs regardless of its pages: header, catalog, page tree, info and trailer.
+_FILE_OVERHEAD = 512
+
+# Resource categories whose entries are looked up by name from content streams.
+_NAMED_RESOURCES = ("/Font", "/XObject", "/ExtGState", "/ColorSpace", "/Pattern", "/Shading", "/Properties")
+
+# Content stream operators that put marks on the page, as whole tokens.
+_PAINT_OPERATOR = re.compile(rb"(?<![^\s\])>])(Tj|TJ|'|\"|Do|BI|sh|f\*|f|F|S|s|B\*|B|b\*|b)(?=[\s/\[(<%]|$)")
+_TEXT_OPERATORS = (b"Tj", b"TJ", b"'", b'"')
+_PATH_OPERATORS = (b"f*", b"f", b"F", b"S", b"s", b"B*", b"B", b"b*", b"b")
+
+# An XObject drawn right after scaling to its size, e.g. "q 612 0 0 792 0 0 cm /Im0 Do Q".
+_PLACED_XOBJECT = re.compile(
+    rb"(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+-?[\d.]+\s+-?[\d.]+\s+cm\s*/([^\s/\[\]()<>{}%]+)\s+Do"
+)
+_DRAWN_XOBJECT = re.compile(rb"/([^\s/\[\]()<>{}%]+)\s+Do(?![^\s/\[(<%])")
+
+# Tokens of a content stream as far as text showing needs them. Literal strings may hold one
+# level of balanced parentheses; deeper nesting is rare enough to ignore.
+_TEXT_TOKEN = re.compile(
+    rb"\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)"
+    rb"|<[0-9A-Fa-f\s]*>"
+    rb"|/[^\s/\[\]()<>{}%]*"
+    rb"|-?(?:\d+\.?\d*|\.\d+)"
+    rb"|[\[\]]"
+    rb"|[A-Za-z'\"*]+",
+    re.S,
+)
+_STRING_ESCAPE = re.compile(rb"\\(?:([0-7]{1,3})|(\r\n|\r|\n)|(.))", re.S)
+_STRING_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+# Operators after which the next text shown starts somewhere else on the page.
+_TEXT_MOVES = {b"Td", b"TD", b"Tm", b"T*", b"BT", b"ET", b"'", b'"'}
+
+# A TJ adjustment at least this large (thousandths of an em) is taken for a space.
+_TJ_SPACE = 250
+
+# Share of the page below which images are too small to count, e.g. a scanner's imprint.
+_MIN_IMAGE_COVERAGE = 0.01
+
+# Compressed over decoded image size. A blank scan compresses below the first
+# ratio, a scan with content stays above the second; in between the page is rendered.
+_BLANK_IMAGE_RATIO = 0.005
+_INK_IMAGE_RATIO = 0.03
+
+_COLOR_COMPONENTS = {"/DeviceGray": 1, "/CalGray": 1, "/DeviceRGB": 3, "/CalRGB": 3, "/DeviceCMYK": 4}
+
+# Rendered pages count as blank while less than this share of pixels is darker than the ink level.
+_RENDER_DPI = 20
+_INK_LEVEL = 160
+_MAX_INK_COVERAGE = 0.005
+
+# Engines extract_pages can copy pages with.
+EXTRACT_ENGINES = ("pypdf", "pikepdf", "auto")
+
+# "auto" extraction uses pikepdf once at least one in this many pages is extracted. pikepdf
+# copies pages natively but loads the whole page tree first, which few pages do not repay.
+_NATIVE_EXTRACT_SHARE = 16
+
+# Characters that are not allowed in file names on at least one platform.
+_UNSAFE_FILENAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+# Page attributes a page takes from its ancestors in the page tree when it has none of its own.
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+class SplitCancelled(Exception):
+    """Raised by a ``Splitter`` method stopped with ``Splitter.cancel``.
+
+    ``part_stats`` still lists the parts written before it stopped.
+    """
 
 
 class Splitter:
@@ -6,41 +99,796 @@ class Splitter:
 
     def __init__(self, input_path: str):
         self.input_path = input_path
-        self.reader = PdfReader(input_path)
+        self._file = None
+        self._buffer = None
+        self._reader = None
+        self._cancel_event = threading.Event()
+        # One dict per file written by the last split or extraction.
+        self.part_stats = []
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.reader = None
+        self.close()
+
+    @property
+    def reader(self) -> PdfReader:
+        """The source document, opened on first use.
+
+        The file is memory-mapped rather than read into memory, so only the
+        cross-reference data and the objects that are actually used get paged in.
+        """
+        if self._reader is None:
+            self._file = open(self.input_path, "rb")
+            try:
+                try:
+                    self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty files cannot be mapped; let the reader report them.
+                    self._buffer = self._file
+                self._reader = PdfReader(self._buffer)
+            except Exception:
+                self.close()
+                raise
+        return self._reader
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages, taken from the page tree without loading the pages."""
+        return get_page_count(self.reader)
+
+    def close(self):
+        """Release the source file. The next use of ``reader`` opens it again."""
+        self._reader = None
+        if self._buffer is not None and self._buffer is not self._file:
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+        self._buffer = None
+        self._file = None
+
+    def cancel(self):
+        """Ask a running split or extraction to stop; safe to call from another thread.
+
+        Splits stop after the part being written and extractions after the page
+        being copied, raising ``SplitCancelled``. An extraction leaves no output
+        file behind. The next split or extraction starts afresh.
+        """
+        self._cancel_event.set()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise SplitCancelled("Split cancelled")
+
+    def _write_parts(self, parts: list[tuple[str, object, dict]], prune_resources: bool, progress_callback) -> int:
+        """Write ``(path, page_numbers, extra_stats)`` parts in order, checking for cancellation between them."""
+        self.part_stats = []
+        for number, (path, page_numbers, extra_stats) in enumerate(parts, start=1):
+            self._check_cancelled()
+            stats = _write_part(self.reader, path, page_numbers, prune_resources)
+            self.part_stats.append({**stats, **extra_stats})
+            if progress_callback:
+                progress_callback(number, len(parts))
+        return len(self.part_stats)
+
+    def split_by_pages(
+        self,
+        output_dir: str,
+        pages_per_file: int = 1,
+        workers: int = 1,
+        prune_resources: bool = False,
+        progress_callback=None,
+    ):
+        """Split PDF into multiple files with specified pages per file.
+
+        Args:
+            output_dir: Directory to write ``split_{n}.pdf`` files to
+            pages_per_file: Number of pages in each part
+            workers: Number of processes. Above 1, contiguous runs of parts are
+                written in parallel, each worker opening the source itself; the
+                files are identical to those of a serial run
+            prune_resources: Drop fonts, images and other resources that no page
+                of a part uses, e.g. when every page shares one document-wide
+                /Resources dictionary
+            progress_callback: Optional ``callback(part_number, total_parts)``
+                called after each part is written; with several workers, after
+                each worker's run of parts
+
+        Returns:
+            Number of files written; ``part_stats`` then holds path, page_count,
+            size and pruned_bytes for each of them
+        """
+        self._cancel_event.clear()
+        total_pages = self.page_count
+        parts = [
+            (file_count + 1, start_page, min(start_page + pages_per_file, total_pages))
+            for file_count, start_page in enumerate(range(0, total_pages, pages_per_file))
+        ]
+
+        if workers > 1 and len(parts) > 1:
+            chunk_size = -(-len(parts) // workers)
+            chunks = [parts[i:i + chunk_size] for i in range(0, len(parts), chunk_size)]
+            self.part_stats = []
+            cancelled = False
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                futures = [
+                    pool.submit(_split_chunk, self.input_path, output_dir, chunk, prune_resources) for chunk in chunks
+                ]
+                for future in futures:
+                    # Runs already under way are finished and reported; the others are dropped.
+                    if self._cancel_event.is_set() and future.cancel():
+                        cancelled = True
+                        continue
+                    self.part_stats.extend(future.result())
+                    if progress_callback:
+                        progress_callback(len(self.part_stats), len(parts))
+            if cancelled:
+                self._check_cancelled()
+            return len(self.part_stats)
 
-    def split_by_pages(self, output_dir: str, pages_per_file: int = 1):
-        """Split PDF into multiple files with specified pages per file."""
+        return self._write_parts(
+            [
+                (f"{output_dir}/split_{number}.pdf", range(start_page, end_page), {})
+                for number, start_page, end_page in parts
+            ],
+            prune_resources,
+            progress_callback,
+        )
+
+    def iter_parts(self, pages_per_file: int = 1, page_ranges=None, prune_resources: bool = False):
+        """Yield split parts as in-memory PDFs instead of writing files.
+
+        Parts hold ``pages_per_file`` pages each, as with ``split_by_pages``,
+        unless ``page_ranges`` gives the 0-based page indexes of each part.
+        Each part is built only when the previous one has been taken, so
+        only one is held in memory at a time.
+
+        Yields:
+            ``(page_numbers, buffer)`` tuples, ``buffer`` being a ``BytesIO``
+            positioned at the start of the part
+        """
+        if page_ranges is None:
+            total_pages = self.page_count
+            page_ranges = (
+                range(start_page, min(start_page + pages_per_file, total_pages))
+                for start_page in range(0, total_pages, pages_per_file)
+            )
+
+        for page_numbers in page_ranges:
+            # Drop the previous part before building the next.
+            buffer = io.BytesIO()
+            writer, _ = _build_part(self.reader, page_numbers, prune_resources)
+            writer.write(buffer)
+            buffer.seek(0)
+            yield page_numbers, buffer
+
+    def split_by_size(self, output_dir: str, max_bytes: int, progress_callback=None):
+        """Split PDF into files of at most ``max_bytes`` each, as far as pages allow.
+
+        Each page's cost is estimated from the sizes of the objects it needs, with
+        objects shared by several pages of a part counted once, and a part is
+        written as soon as the next page would take it over budget. Resources
+        the pages do not use are pruned, as with ``prune_resources``. A page
+        that is larger than the budget on its own becomes a part by itself.
+        ``progress_callback(part_number, total_parts)`` is called after each part.
+
+        Returns:
+            Number of files written; ``part_stats`` holds path, page_count, size,
+            pruned_bytes and estimated_size for each of them
+        """
+        self._cancel_event.clear()
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+
+        parts = []
+        sizes = {}
+        page_numbers = []
+        part_objects = set()
+        part_size = _FILE_OVERHEAD
+
+        def close_part():
+            path = f"{output_dir}/split_{len(parts) + 1}.pdf"
+            parts.append((path, page_numbers, {"estimated_size": part_size}))
+
+        for page_num, page in enumerate(self.reader.pages):
+            objects = _page_objects(page, sizes)
+            added = sum(size + _OBJECT_OVERHEAD for key, size in objects.items() if key not in part_objects)
+            if page_numbers and part_size + added > max_bytes:
+                close_part()
+                page_numbers = []
+                part_objects = set()
+                part_size = _FILE_OVERHEAD
+                added = sum(size + _OBJECT_OVERHEAD for size in objects.values())
+
+            page_numbers.append(page_num)
+            part_objects.update(objects)
+            part_size += added
+
+        if page_numbers:
+            close_part()
+        return self._write_parts(parts, True, progress_callback)
+
+    def split_by_outline(
+        self, output_dir: str, max_depth: int = 1, prune_resources: bool = False, progress_callback=None
+    ):
+        """Split PDF into one file per bookmark, e.g. one per chapter.
+
+        The outline is read once and every bookmark down to ``max_depth`` levels
+        (1 for top-level bookmarks only) starts a part that runs up to the next
+        one. Parts are named ``{n:02d}_{title}.pdf``; pages before the first
+        bookmark go into a part titled "Front matter". Bookmarks that point
+        nowhere, or to the same page as the one after them, start no part, and
+        a document without bookmarks is not split at all.
+        ``progress_callback(part_number, total_parts)`` is called after each part.
+
+        Returns:
+            Number of files written; ``part_stats`` holds path, page_count, size,
+            pruned_bytes and title for each of them
+        """
+        self._cancel_event.clear()
+        if max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+
+        starts = sorted(
+            (page_num, order, title)
+            for order, (title, page_num) in enumerate(_outline_starts(self.reader, self.reader.outline, max_depth))
+            if page_num >= 0
+        )
         total_pages = len(self.reader.pages)
-        
-        file_count = 0
-        for start_page in range(0, total_pages, pages_per_file):
-            writer = PdfWriter()
-            end_page = min(start_page + pages_per_file, total_pages)
-            
-            for page_num in range(start_page, end_page):
-                writer.add_page(self.reader.pages[page_num])
-            
-            output_path = f"{output_dir}/split_{file_count + 1}.pdf"
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
-            
-            file_count += 1
-        
-        return file_count
-
-    def extract_pages(self, output_path: str, page_numbers: list[int]):
-        """Extract specific pages from PDF."""
-        writer = PdfWriter()
-        
-        for page_num in page_numbers:
-            if 0 <= page_num < len(self.reader.pages):
-                writer.add_page(self.reader.pages[page_num])
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
+        if starts and starts[0][0] > 0:
+            starts.insert(0, (0, -1, "Front matter"))
+
+        chapters = []
+        for index, (start_page, _, title) in enumerate(starts):
+            end_page = starts[index + 1][0] if index + 1 < len(starts) else total_pages
+            if start_page < end_page:
+                chapters.append((title, start_page, end_page))
+
+        return self._write_parts(
+            [
+                (
+                    os.path.join(output_dir, f"{number:02d}_{_safe_filename(title)}.pdf"),
+                    range(start, end),
+                    {"title": title},
+                )
+                for number, (title, start, end) in enumerate(chapters, start=1)
+            ],
+            prune_resources,
+            progress_callback,
+        )
+
+    def find_blank_pages(self, render_dpi: int = _RENDER_DPI) -> list[int]:
+        """Return the indexes of blank or near-blank pages, without rendering where possible.
+
+        Pages are judged from their content streams first: pages that draw
+        nothing are blank, pages that show text are not. Images covering a
+        noticeable part of the page are judged by how well they compress,
+        since an empty scan compresses to almost nothing. Only pages these
+        checks cannot settle, e.g. ones with vector drawings or inline images,
+        are rendered at ``render_dpi`` and their dark pixels counted.
+        """
+        blank = []
+        unsure = []
+        for page_num, page in enumerate(self.reader.pages):
+            verdict = _blank_verdict(page)
+            if verdict:
+                blank.append(page_num)
+            elif verdict is None:
+                unsure.append(page_num)
+
+        if unsure:
+            with pdfplumber.open(self.input_path) as pdf:
+                blank.extend(page_num for page_num in unsure if _renders_blank(pdf.pages[page_num], render_dpi))
+        return sorted(blank)
+
+    def split_on_blank_pages(self, output_dir: str, prune_resources: bool = False, progress_callback=None):
+        """Split PDF at blank separator pages, e.g. sheets a batch scanner put between documents.
+
+        The separators are left out, and runs of them count as one.
+        ``progress_callback(part_number, total_parts)`` is called after each part.
+
+        Returns:
+            Number of files written; ``part_stats`` holds path, page_count, size
+            and pruned_bytes for each of them
+        """
+        self._cancel_event.clear()
+        separators = self.find_blank_pages()
+        bounds = [-1, *separators, self.page_count]
+        ranges = [range(start + 1, end) for start, end in zip(bounds, bounds[1:], strict=False) if end > start + 1]
+
+        return self._write_parts(
+            [(f"{output_dir}/split_{number}.pdf", pages, {}) for number, pages in enumerate(ranges, start=1)],
+            prune_resources,
+            progress_callback,
+        )
+
+    def find_text_pages(self, pattern, progress_callback=None) -> list[int]:
+        """Return the indexes of pages whose text matches the regex ``pattern``.
+
+        Text is read straight from the strings the content streams show,
+        including those of form XObjects the page draws, without any layout
+        analysis. Pages set in composite (Type0) fonts, whose strings are
+        glyph codes rather than characters, go through pypdf's text
+        extraction instead. ``progress_callback(page_number, page_count)`` is
+        called after each page.
+        """
+        self._cancel_event.clear()
+        regex = re.compile(pattern)
+        page_count = len(self.reader.pages)
+        matches = []
+        for page_num, page in enumerate(self.reader.pages):
+            self._check_cancelled()
+            if regex.search(_page_text(page)):
+                matches.append(page_num)
+            if progress_callback:
+                progress_callback(page_num + 1, page_count)
+        return matches
+
+    def split_on_text(self, output_dir: str, pattern, prune_resources: bool = False, progress_callback=None):
+        """Split PDF so that every page whose text matches ``pattern`` starts a new part.
+
+        Pages before the first match form a part of their own. See
+        ``find_text_pages`` for how the text is read.
+        ``progress_callback(part_number, total_parts)`` is called after each part.
+
+        Returns:
+            Number of files written; ``part_stats`` holds path, page_count, size
+            and pruned_bytes for each of them
+        """
+        self._cancel_event.clear()
+        starts = [page_num for page_num in self.find_text_pages(pattern) if page_num > 0]
+        bounds = [0, *starts, self.page_count]
+        ranges = [range(start, end) for start, end in zip(bounds, bounds[1:], strict=False) if end > start]
+
+        return self._write_parts(
+            [(f"{output_dir}/split_{number}.pdf", pages, {}) for number, pages in enumerate(ranges, start=1)],
+            prune_resources,
+            progress_callback,
+        )
+
+    def extract_pages(
+        self,
+        output_path: str,
+        page_numbers: list[int],
+        prune_resources: bool = False,
+        engine: str = "pypdf",
+        progress_callback=None,
+    ):
+        """Extract specific pages from PDF.
+
+        With ``prune_resources``, resources none of the pages use are left out;
+        ``part_stats`` then reports the bytes saved.
+
+        ``engine`` is one of ``EXTRACT_ENGINES``. "pikepdf" copies the pages'
+        objects inside qpdf without decoding any streams, which is much faster
+        for many or image-heavy pages but does not report pruned bytes
+        (``None``). "auto" uses it when at least a sixteenth of the pages
+        are extracted and pypdf's lazy page lookup otherwise.
+
+        ``progress_callback(page_number, page_count)`` is called after each page
+        is copied; the pikepdf engine copies them all at once and reports the
+        last page only.
+        """
+        self._cancel_event.clear()
+        if engine not in EXTRACT_ENGINES:
+            raise ValueError(f"Unknown extraction engine: {engine}")
+
+        page_count = self.page_count
+        page_numbers = [page_num for page_num in page_numbers if 0 <= page_num < page_count]
+        if engine == "auto":
+            engine = "pikepdf" if len(page_numbers) * _NATIVE_EXTRACT_SHARE >= page_count else "pypdf"
+
+        def on_page(page_number: int, page_count: int):
+            self._check_cancelled()
+            if progress_callback:
+                progress_callback(page_number, page_count)
+
+        self.part_stats = []
+        self._check_cancelled()
+        if engine == "pikepdf":
+            self.part_stats = [_write_part_native(self.input_path, output_path, page_numbers, prune_resources)]
+            if progress_callback and page_numbers:
+                progress_callback(len(page_numbers), len(page_numbers))
+        else:
+            self.part_stats = [_write_part(self.reader, output_path, page_numbers, prune_resources, on_page)]
+
+
+def _write_part(reader: PdfReader, output_path: str, page_numbers, prune_resources: bool, on_page=None) -> dict:
+    # The file is only opened once the part is complete, so stopping in on_page leaves none behind.
+    writer, pruned_bytes = _build_part(reader, page_numbers, prune_resources, on_page)
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+
+    return {
+        "path": output_path,
+        "page_count": len(writer.pages),
+        "size": os.path.getsize(output_path),
+        "pruned_bytes": pruned_bytes,
+    }
+
+
+def _build_part(reader: PdfReader, page_numbers, prune_resources: bool, on_page=None) -> tuple[PdfWriter, int]:
+    """Copy the given pages of ``reader`` into a new writer; return it and the pruned bytes.
+
+    ``on_page(page_number, page_count)`` is called after each page is copied.
+    """
+    writer = PdfWriter()
+    page_count = len(page_numbers)
+    for number, page_num in enumerate(page_numbers, start=1):
+        page = writer.add_page(_page_at(reader, page_num))
+        if prune_resources:
+            _prune_page_resources(page)
+        if on_page:
+            on_page(number, page_count)
+
+    pruned_bytes = _drop_unreachable(writer) if prune_resources else 0
+    return writer, pruned_bytes
+
+
+def _write_part_native(input_path: str, output_path: str, page_numbers, prune_resources: bool) -> dict:
+    """Like ``_write_part``, but copying the pages' object graphs within qpdf through pikepdf."""
+    with pikepdf.open(input_path, access_mode=pikepdf.AccessMode.mmap) as source, pikepdf.new() as target:
+        # Indexing source.pages looks the page up anew every time; one pass over it is far cheaper.
+        pages = list(source.pages)
+        target.pages.extend(pages[page_num] for page_num in page_numbers)
+        if prune_resources:
+            target.remove_unreferenced_resources()
+        # Streams are written exactly as stored, without qpdf decoding or recompressing them.
+        target.save(output_path, compress_streams=False, stream_decode_level=pikepdf.StreamDecodeLevel.none)
+
+    return {
+        "path": output_path,
+        "page_count": len(page_numbers),
+        "size": os.path.getsize(output_path),
+        "pruned_bytes": None,
+    }
+
+
+def _split_chunk(input_path: str, output_dir: str, parts: list[tuple[int, int, int]], prune_resources: bool):
+    """Write one contiguous run of parts of a parallel split from a reader of its own."""
+    with Splitter(input_path) as splitter:
+        return [
+            _write_part(splitter.reader, f"{output_dir}/split_{number}.pdf", range(start_page, end_page), prune_resources)
+            for number, start_page, end_page in parts
+        ]
+
+
+def _page_at(reader: PdfReader, index: int) -> PageObject:
+    """Return page ``index`` of ``reader``, resolving only the page tree nodes on its path.
+
+    ``reader.pages`` loads every page dictionary of the document on first use;
+    this descends by the /Count of each node instead. Inherited attributes are
+    copied onto the page as ``reader.pages`` would. Falls back to ``reader.pages``
+    when the pages are already loaded or the page tree's counts do not add up.
+    """
+    if reader.flattened_pages is not None:
+        return reader.pages[index]
+
+    node = reader.root_object.get("/Pages")
+    node = node.get_object() if node is not None else None
+    reference = None
+    inherited = {}
+    remaining = index
+    while isinstance(node, DictionaryObject) and "/Kids" in node:
+        inherited.update((key, node[key]) for key in _INHERITABLE if key in node)
+        kids = node["/Kids"].get_object()
+        leaves_only = node.get("/Count") == len(kids)
+        if leaves_only:
+            # As many pages as kids: each kid is a page, no need to look at the others.
+            kids = kids[remaining:remaining + 1]
+            remaining = 0
+        for kid in kids:
+            child = kid.get_object()
+            count = child.get("/Count") if isinstance(child, DictionaryObject) and "/Kids" in child else 1
+            if not isinstance(count, int) or (leaves_only and count != 1):
+                return reader.pages[index]
+            if remaining < count:
+                reference, node = kid, child
+                break
+            remaining -= count
+        else:
+            node = None
+
+    if not isinstance(node, DictionaryObject) or remaining or node.get("/Type", "/Page") != "/Page":
+        return reader.pages[index]
+    for key, value in inherited.items():
+        if key not in node:
+            node[NameObject(key)] = value
+    page = PageObject(reader, reference if isinstance(reference, IndirectObject) else None)
+    page.update(node)
+    return page
+
+
+def _outline_starts(reader: PdfReader, outline: list, depth: int):
+    """Yield ``(title, page_number)`` for each bookmark in ``outline`` down to ``depth`` levels.
+
+    In pypdf's outline a bookmark's children follow it as a nested list.
+    """
+    for item in outline:
+        if isinstance(item, list):
+            if depth > 1:
+                yield from _outline_starts(reader, item, depth - 1)
+        else:
+            page_num = reader.get_destination_page_number(item) if item.page is not None else -1
+            yield item.title or "Untitled", page_num
+
+
+def _blank_verdict(page) -> bool | None:
+    """Tell from its objects alone whether ``page`` is blank; ``None`` when that takes rendering."""
+    annotations = page["/Annots"] if "/Annots" in page else []
+    for annotation in annotations:
+        if annotation.get_object().get("/Subtype") not in ("/Link", "/Popup"):
+            return False
+    contents = page.get_contents()
+    if contents is None:
+        return True
+
+    data = contents.get_data()
+    operators = Counter(_PAINT_OPERATOR.findall(data))
+    if any(operators[op] for op in _TEXT_OPERATORS):
+        return False
+    if operators[b"BI"] or operators[b"sh"] or any(operators[op] for op in _PATH_OPERATORS):
+        return None
+    if not operators[b"Do"]:
+        return True
+
+    resources = page["/Resources"] if "/Resources" in page else {}
+    xobjects = resources["/XObject"] if "/XObject" in resources else {}
+    page_area = abs(float(page.mediabox.width) * float(page.mediabox.height)) or 1.0
+    placed = {}
+    for a, b, c, d, name in _PLACED_XOBJECT.findall(data):
+        key = "/" + name.decode("latin-1")
+        placed[key] = max(placed.get(key, 0.0), abs(float(a) * float(d) - float(b) * float(c)))
+
+    verdict = True
+    for name in {"/" + name.decode("latin-1") for name in _DRAWN_XOBJECT.findall(data)}:
+        xobject = xobjects.get(name)
+        xobject = xobject.get_object() if xobject is not None else None
+        if not isinstance(xobject, DictionaryObject):
+            continue
+        if xobject.get("/Subtype") != "/Image":
+            return None
+        # Images drawn without a plain scaling in front of them are assumed to fill the page.
+        if placed.get(name, page_area) / page_area < _MIN_IMAGE_COVERAGE:
+            continue
+        ratio = _compression_ratio(xobject)
+        if ratio is not None and ratio >= _INK_IMAGE_RATIO:
+            return False
+        if ratio is None or ratio >= _BLANK_IMAGE_RATIO:
+            verdict = None
+    return verdict
+
+
+def _compression_ratio(image: DictionaryObject) -> float | None:
+    """Return the encoded size of ``image`` over its decoded size, or ``None`` if unknown."""
+    try:
+        # pypdf keeps a stream's encoded bytes in _data and drops /Length once read.
+        width, height, length = int(image["/Width"]), int(image["/Height"]), len(image._data)
+        if "/ImageMask" in image and image["/ImageMask"]:
+            components, bits = 1, 1
+        else:
+            color_space = image["/ColorSpace"] if "/ColorSpace" in image else None
+            if isinstance(color_space, ArrayObject) and color_space[0] == "/ICCBased":
+                components = int(color_space[1].get_object()["/N"])
+            elif isinstance(color_space, ArrayObject) and color_space[0] == "/Indexed":
+                components = 1
+            else:
+                components = _COLOR_COMPONENTS.get(color_space, 3)
+            bits = int(image["/BitsPerComponent"]) if "/BitsPerComponent" in image else 8
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    decoded = width * height * components * bits / 8
+    return length / decoded if decoded else None
+
+
+def _renders_blank(page, dpi: int) -> bool:
+    image = page.to_image(resolution=dpi).original.convert("L")
+    ink = sum(image.histogram()[:_INK_LEVEL])
+    return ink / (image.width * image.height) < _MAX_INK_COVERAGE
+
+
+def _page_text(page) -> str:
+    """Return the text ``page`` shows, read from its content streams without layout analysis."""
+    resources = page["/Resources"] if "/Resources" in page else {}
+    fonts = resources["/Font"] if "/Font" in resources else {}
+    if any(font.get_object().get("/Subtype") == "/Type0" for font in fonts.values()):
+        return page.extract_text()
+
+    contents = page.get_contents()
+    if contents is None:
+        return ""
+    data = contents.get_data()
+    parts = [_content_text(data)]
+
+    # Text drawn through form XObjects, e.g. a letterhead or form template.
+    xobjects = resources["/XObject"] if "/XObject" in resources else {}
+    pending = [(data, xobjects)]
+    seen = set()
+    while pending:
+        data, xobjects = pending.pop()
+        for name in _DRAWN_XOBJECT.findall(data):
+            form = xobjects.get("/" + name.decode("latin-1"))
+            form = form.get_object() if form is not None else None
+            if isinstance(form, DictionaryObject) and form.get("/Subtype") == "/Form" and id(form) not in seen:
+                seen.add(id(form))
+                form_data = form.get_data()
+                parts.append(_content_text(form_data))
+                form_resources = form["/Resources"] if "/Resources" in form else {}
+                pending.append((form_data, form_resources["/XObject"] if "/XObject" in form_resources else xobjects))
+    return "\n".join(parts)
+
+
+def _content_text(data: bytes) -> str:
+    """Join the strings shown by Tj, TJ, ' and " in a content stream, decoded as Latin-1."""
+    text = []
+    operands = []
+    array = None
+    for token in _TEXT_TOKEN.findall(data):
+        first = token[:1]
+        if first == b"(" or (first == b"<" and token[1:2] != b"<"):
+            string = _decode_string(token)
+            (array if array is not None else operands).append(string)
+        elif first == b"[":
+            array = []
+        elif first == b"]":
+            operands.append(array or [])
+            array = None
+        elif array is not None:
+            # A wide negative adjustment between strings of a TJ array separates words.
+            if first in b"-.0123456789" and float(token) <= -_TJ_SPACE:
+                array.append(" ")
+        elif first.isalpha() or first in b"'\"*":
+            if token in _TEXT_MOVES and text and not text[-1].isspace():
+                text.append(" ")
+            if token in (b"Tj", b"'", b'"') and operands and isinstance(operands[-1], str):
+                text.append(operands[-1])
+            elif token == b"TJ" and operands and isinstance(operands[-1], list):
+                text.append("".join(operands[-1]))
+            operands = []
+    return "".join(text)
+
+
+def _decode_string(token: bytes) -> str:
+    if token[:1] == b"<":
+        digits = bytes(c for c in token[1:-1] if not chr(c).isspace())
+        return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii")).decode("latin-1")
+
+    def unescape(match):
+        octal, newline, char = match.groups()
+        if octal:
+            return bytes([int(octal, 8) & 0xFF])
+        if newline:
+            return b""
+        return _STRING_ESCAPES.get(char, char)
+
+    return _STRING_ESCAPE.sub(unescape, token[1:-1]).decode("latin-1")
+
+
+def _safe_filename(title: str) -> str:
+    name = _UNSAFE_FILENAME.sub("_", title).strip(" ._")[:80]
+    return name or "Untitled"
+
+
+def _used_names(data: bytes) -> set[str]:
+    return {"/" + name.decode("latin-1") for name in _NAME_TOKEN.findall(data)}
+
+
+def _page_resources(page):
+    """Return the page's /Resources dictionary and the resource names its content uses.
+
+    Form XObjects without resources of their own draw with the page's, so the
+    names they use count as used as well. Returns ``(None, None)`` when the page
+    has no resources or no content to look at.
+    """
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else None
+    contents = page.get_contents()
+    if not isinstance(resources, DictionaryObject) or contents is None:
+        return None, None
+
+    used = _used_names(contents.get_data())
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else None
+    pending = set(used)
+    while isinstance(xobjects, DictionaryObject) and pending:
+        name = pending.pop()
+        form = xobjects.get(name)
+        form = form.get_object() if form is not None else None
+        if isinstance(form, DictionaryObject) and form.get("/Subtype") == "/Form" and "/Resources" not in form:
+            new_names = _used_names(form.get_data()) - used
+            used |= new_names
+            pending |= new_names
+    return resources, used
+
+
+def _prune_page_resources(page):
+    """Give ``page`` its own /Resources holding only the entries its content names."""
+    resources, used = _page_resources(page)
+    if resources is not None:
+        page[NameObject("/Resources")] = _pruned_resources(resources, used)
+
+
+def _pruned_resources(resources: DictionaryObject, used: set[str]) -> DictionaryObject:
+    pruned = DictionaryObject()
+    for category, entries in resources.items():
+        entries = entries.get_object()
+        if category in _NAMED_RESOURCES and isinstance(entries, DictionaryObject):
+            pruned[category] = DictionaryObject({key: value for key, value in entries.items() if key in used})
+        else:
+            pruned[category] = entries
+    return pruned
+
+
+def _page_objects(page, sizes: dict) -> dict:
+    """Map every object ``page`` needs once pruned to its serialized size.
+
+    ``sizes`` caches object sizes by reference across calls. Other pages, e.g.
+    link targets, are not followed.
+    """
+    resources, used = _page_resources(page)
+    page_ref = page.indirect_reference
+    page_size = _serialized_size(page) + _KIDS_ENTRY
+
+    stack = []
+    for key, value in page.items():
+        if key == "/Parent":
+            continue
+        if key == "/Resources" and resources is not None:
+            # Pruning writes the resources straight into the page dictionary.
+            pruned = _pruned_resources(resources, used)
+            page_size += _serialized_size(pruned)
+            stack.append(pruned)
+        else:
+            stack.append(value)
+
+    objects = {(page_ref.idnum, page_ref.generation): page_size}
+
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in objects:
+                continue
+            resolved = obj.get_object()
+            if isinstance(resolved, DictionaryObject) and resolved.get("/Type") in ("/Page", "/Pages"):
+                continue
+            if key not in sizes:
+                sizes[key] = _serialized_size(resolved)
+            objects[key] = sizes[key]
+            stack.append(resolved)
+        elif isinstance(obj, DictionaryObject):
+            stack.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            stack.extend(obj)
+    return objects
+
+
+def _serialized_size(obj) -> int:
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer)
+    return buffer.tell()
+
+
+def _drop_unreachable(writer: PdfWriter) -> int:
+    """Remove objects nothing in the document refers to and return their serialized size."""
+    reachable = set()
+    stack = [writer._root_object.indirect_reference, writer._info_obj.indirect_reference]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if obj.idnum in reachable:
+                continue
+            reachable.add(obj.idnum)
+            stack.append(writer._objects[obj.idnum - 1])
+        elif isinstance(obj, DictionaryObject):
+            stack.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            stack.extend(obj)
+
+    dropped = 0
+    for idnum, obj in enumerate(writer._objects, start=1):
+        if obj is not None and idnum not in reachable:
+            dropped += _serialized_size(obj)
+            writer._objects[idnum - 1] = None
+    return dropped
@@ -1,5 +1,8 @@
 from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QHBoxLayout, QScrollArea, QComboBox
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QHBoxLayout, QScrollArea, QComboBox, QCheckBox,
+    QSpinBox
+)
 import os
 
 from src.ui.widgets.drop_zone import DropZone
@@ -11,11 +14,13 @@ class CompressWorker(QThread):
     error = Signal(str)
     progress = Signal(int, int)
     
-    def __init__(self, input_path, output_path, level):
+    def __init__(self, input_path, output_path, level, workers=None, target_bytes=None):
         super().__init__()
         self.input_path = input_path
         self.output_path = output_path
         self.level = level
+        self.workers = workers or os.cpu_count() or 1
+        self.target_bytes = target_bytes
     
     def run(self):
         try:
@@ -23,7 +28,9 @@ class CompressWorker(QThread):
                 stats = compressor.compress(
                     self.output_path, 
                     self.level,
-                    progress_callback=lambda current, total: self.progress.emit(current, total)
+                    progress_callback=lambda current, total: self.progress.emit(current, total),
+                    workers=self.workers,
+                    target_bytes=self.target_bytes,
                 )
             self.finished.emit(stats)
         except Exception as e:
@@ -85,13 +92,33 @@ class CompressView(QWidget):
         
         self.level_combo = QComboBox()
         self.level_combo.setObjectName("levelCombo")
-        self.level_combo.addItems(["Low", "Medium", "High"])
+        self.level_combo.addItems(["Low", "Medium", "High", "Lossless"])
         self.level_combo.setCurrentIndex(1)
         level_layout.addWidget(self.level_combo)
         level_layout.addStretch()
         
         layout.addWidget(level_container)
 
+        target_container = QHBoxLayout()
+        target_container.setSpacing(12)
+
+        self.target_checkbox = QCheckBox("Compress to fit a target size instead:")
+        self.target_checkbox.setObjectName("optionCheck")
+        self.target_checkbox.toggled.connect(self._on_target_mode_toggled)
+        target_container.addWidget(self.target_checkbox)
+
+        self.target_spinbox = QSpinBox()
+        self.target_spinbox.setMinimum(1)
+        self.target_spinbox.setMaximum(10000)
+        self.target_spinbox.setValue(10)
+        self.target_spinbox.setSuffix(" MB")
+        self.target_spinbox.setFixedWidth(120)
+        self.target_spinbox.setEnabled(False)
+        target_container.addWidget(self.target_spinbox)
+        target_container.addStretch()
+
+        layout.addLayout(target_container)
+
         self.file_info = QLabel("")
         self.file_info.setObjectName("fileInfo")
         self.file_info.setVisible(False)
@@ -119,6 +146,11 @@ class CompressView(QWidget):
 
         layout.addLayout(button_layout)
 
+    def _on_target_mode_toggled(self, checked):
+        """Switch between compressing by level and to a target size."""
+        self.target_spinbox.setEnabled(checked)
+        self.level_combo.setEnabled(not checked)
+
     def _handle_files_dropped(self, files):
         if not files:
             from PySide6.QtWidgets import QFileDialog
@@ -158,13 +190,14 @@ class CompressView(QWidget):
 
         self.output_path = output_path
         level = self.level_combo.currentText().lower()
+        self.target_bytes = self.target_spinbox.value() * 1024 * 1024 if self.target_checkbox.isChecked() else None
         
         self.compress_btn.setText("⏳ Compressing...")
         self.compress_btn.setEnabled(False)
         self.clear_btn.setEnabled(False)
-        self.level_combo.setEnabled(False)
+        self._set_options_enabled(False)
         
-        self.worker = CompressWorker(self.current_file, output_path, level)
+        self.worker = CompressWorker(self.current_file, output_path, level, target_bytes=self.target_bytes)
         self.worker.finished.connect(self._on_compress_finished)
         self.worker.error.connect(self._on_compress_error)
         self.worker.start()
@@ -175,10 +208,12 @@ class CompressView(QWidget):
         reduction = stats["reduction_percent"]
 
         message = f"✅ PDF compressed successfully! Original: {original_mb:.2f} MB → Compressed: {compressed_mb:.2f} MB (Reduction: {reduction:.1f}%)\nSaved to: {self.output_path}"
+        if self.target_bytes and stats["compressed_size"] > self.target_bytes:
+            message += "\nThe target size could not be reached."
         
         self.compress_btn.setText("🗜️  Compress PDF")
         self.compress_btn.setEnabled(True)
-        self.level_combo.setEnabled(True)
+        self._set_options_enabled(True)
         self.worker = None
         
         self._show_status(message, "success")
@@ -188,11 +223,16 @@ class CompressView(QWidget):
         self.compress_btn.setText("🗜️  Compress PDF")
         self.compress_btn.setEnabled(True)
         self.clear_btn.setEnabled(True)
-        self.level_combo.setEnabled(True)
+        self._set_options_enabled(True)
         self.worker = None
         
         self._show_status(f"❌ Failed to compress PDF: {error_msg}", "error")
 
+    def _set_options_enabled(self, enabled):
+        self.target_checkbox.setEnabled(enabled)
+        self.target_spinbox.setEnabled(enabled and self.target_checkbox.isChecked())
+        self.level_combo.setEnabled(enabled and not self.target_checkbox.isChecked())
+
     def _show_status(self, message, status_type="info"):
         self.status_label.setText(message)
         self.status_container.setProperty("statusType", status_type)
@@ -260,6 +300,38 @@ class CompressView(QWidget):
                 width: 20px;
             }
             
+            QCheckBox#optionCheck {
+                color: #8892b0;
+                font-size: 13px;
+                spacing: 8px;
+            }
+            
+            QCheckBox#optionCheck::indicator {
+                width: 20px;
+                height: 20px;
+                border: 2px solid #00d9ff;
+                border-radius: 4px;
+                background: #0a0e27;
+            }
+            
+            QCheckBox#optionCheck::indicator:checked {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #00d9ff, stop:1 #00b8d4);
+            }
+            
+            QSpinBox {
+                background: rgba(26, 31, 58, 0.8);
+                color: #00d9ff;
+                border: 1px solid rgba(0, 217, 255, 0.3);
+                border-radius: 6px;
+                padding: 8px 12px;
+                font-size: 13px;
+            }
+            
+            QSpinBox:disabled {
+                color: #5a5f7a;
+            }
+            
             QComboBox#levelCombo QAbstractItemView {
                 background: #1a1f3a;
                 color: #00d9ff;
@@ -1,13 +1,51 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog,
-    QLabel, QFrame, QLineEdit
+    QLabel, QFrame, QLineEdit, QProgressBar
 )
-from PySide6.QtCore import Qt
-from src.modules.split import Splitter
+from PySide6.QtCore import Qt, QThread, Signal
+from src.modules.split import SplitCancelled, Splitter
 from src.modules.pdf_utils import parse_page_numbers, get_pdf_info
 from src.ui.widgets.drop_zone import DropZone
 
 
+class ExtractWorker(QThread):
+    """Worker thread for extracting pages."""
+    finished = Signal(dict)
+    error = Signal(str)
+    cancelled = Signal()
+    page_progress = Signal(int, int)
+
+    def __init__(self, input_file, output_file, page_numbers):
+        super().__init__()
+        self.output_file = output_file
+        self.page_numbers = list(page_numbers)
+        self.splitter = Splitter(input_file)
+        self._cancel_requested = False
+
+    def cancel(self):
+        # Each operation clears earlier cancels when it starts, so one asked for before then is kept here.
+        self._cancel_requested = True
+        self.splitter.cancel()
+
+    def run(self):
+        try:
+            with self.splitter as splitter:
+                if self._cancel_requested:
+                    raise SplitCancelled("Split cancelled")
+                splitter.extract_pages(
+                    self.output_file,
+                    self.page_numbers,
+                    prune_resources=True,
+                    engine="auto",
+                    progress_callback=self.page_progress.emit,
+                )
+            self.finished.emit(self.splitter.part_stats[0])
+        except SplitCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class ExtractView(QWidget):
     """Futuristic extract pages view."""
 
@@ -16,6 +54,8 @@ class ExtractView(QWidget):
         self._on_back_click = on_back_click
         self.input_file = None
         self.total_pages = 0
+        self.output_file = None
+        self.worker = None
         self._setup_ui()
         self._apply_styles()
 
@@ -61,6 +101,11 @@ class ExtractView(QWidget):
         self.options_section.setEnabled(False)
         layout.addWidget(self.options_section)
 
+        # Progress
+        self.progress_container = self._create_progress_section()
+        self.progress_container.hide()
+        layout.addWidget(self.progress_container)
+
         # Actions
         self.actions_section = self._create_actions()
         self.actions_section.setEnabled(False)
@@ -143,19 +188,43 @@ class ExtractView(QWidget):
 
         return container
 
+    def _create_progress_section(self):
+        """Create the extraction progress section."""
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setObjectName("progressLabel")
+        layout.addWidget(self.progress_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setObjectName("progressBar")
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        return container
+
     def _create_actions(self):
         """Create the action buttons section."""
         container = QWidget()
         layout = QHBoxLayout(container)
         layout.setSpacing(16)
 
-        clear_btn = QPushButton("CLEAR")
-        clear_btn.setProperty("class", "secondary-button")
-        clear_btn.clicked.connect(self.clear_file)
-        layout.addWidget(clear_btn)
+        self.clear_btn = QPushButton("CLEAR")
+        self.clear_btn.setProperty("class", "secondary-button")
+        self.clear_btn.clicked.connect(self.clear_file)
+        layout.addWidget(self.clear_btn)
 
         layout.addStretch()
 
+        self.cancel_btn = QPushButton("CANCEL")
+        self.cancel_btn.setProperty("class", "secondary-button")
+        self.cancel_btn.clicked.connect(self.cancel_extract)
+        self.cancel_btn.hide()
+        layout.addWidget(self.cancel_btn)
+
         self.extract_btn = QPushButton("📄  EXTRACT PAGES")
         self.extract_btn.setProperty("class", "primary-button")
         self.extract_btn.clicked.connect(self.extract_pages)
@@ -232,6 +301,8 @@ class ExtractView(QWidget):
     def extract_pages(self):
         """Extract specific pages from PDF."""
         self._hide_status()
+        if self.worker:
+            return
         if not self.input_file:
             self._show_status("⚠️ Please select a PDF file to extract pages from.", "error")
             return
@@ -258,18 +329,56 @@ class ExtractView(QWidget):
         
         self.extract_btn.setText("⏳ Extracting...")
         self.extract_btn.setEnabled(False)
+        self.clear_btn.setEnabled(False)
         self.options_section.setEnabled(False)
-            
-        try:
-            with Splitter(self.input_file) as splitter:
-                splitter.extract_pages(output_file, page_numbers)
-            self._show_status(f"✅ Pages extracted successfully! Saved to: {output_file}", "success")
-        except Exception as e:
-            self._show_status(f"❌ Failed to extract pages: {str(e)}", "error")
-        finally:
-            self.extract_btn.setText("📄  EXTRACT PAGES")
-            self.extract_btn.setEnabled(True)
-            self.options_section.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.progress_bar.setRange(0, len(page_numbers))
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
+        self.progress_container.show()
+
+        self.output_file = output_file
+        self.worker = ExtractWorker(self.input_file, output_file, page_numbers)
+        self.worker.page_progress.connect(self._on_page_progress)
+        self.worker.finished.connect(self._on_extract_finished)
+        self.worker.error.connect(self._on_extract_error)
+        self.worker.cancelled.connect(self._on_extract_cancelled)
+        self.worker.start()
+
+    def cancel_extract(self):
+        """Stop the running extraction after the current page."""
+        if self.worker:
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+            self.worker.cancel()
+
+    def _on_page_progress(self, page_number, page_count):
+        self.progress_bar.setRange(0, page_count)
+        self.progress_bar.setValue(page_number)
+        if self.cancel_btn.isEnabled():
+            self.progress_label.setText(f"Page {page_number} of {page_count}")
+
+    def _on_extract_finished(self, stats):
+        self._reset_after_extract()
+        self._show_status(f"✅ Pages extracted successfully! Saved to: {self.output_file}", "success")
+
+    def _on_extract_error(self, error_msg):
+        self._reset_after_extract()
+        self._show_status(f"❌ Failed to extract pages: {error_msg}", "error")
+
+    def _on_extract_cancelled(self):
+        self._reset_after_extract()
+        self._show_status("⚠️ Extraction cancelled. No output file was written.", "error")
+
+    def _reset_after_extract(self):
+        self.worker = None
+        self.progress_container.hide()
+        self.cancel_btn.hide()
+        self.extract_btn.setText("📄  EXTRACT PAGES")
+        self.extract_btn.setEnabled(True)
+        self.clear_btn.setEnabled(True)
+        self.options_section.setEnabled(True)
 
     def _apply_styles(self):
         """Apply futuristic styles to extract view."""
@@ -341,6 +450,24 @@ class ExtractView(QWidget):
                 border: 2px solid #00d9ff;
             }
             
+            QLabel#progressLabel {
+                font-size: 12px;
+                color: #8892b0;
+            }
+            
+            QProgressBar#progressBar {
+                background: #0a0e27;
+                border: 1px solid #00d9ff;
+                border-radius: 4px;
+                max-height: 8px;
+            }
+            
+            QProgressBar#progressBar::chunk {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #00d9ff, stop:1 #7b2cbf);
+                border-radius: 4px;
+            }
+            
             QPushButton[class="secondary-button"] {
                 background: transparent;
                 color: #8892b0;
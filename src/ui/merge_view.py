@@ -1,3 +1,5 @@
+import os
+
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -8,12 +10,62 @@ from PySide6.QtWidgets import (
     QLabel,
     QFrame,
     QListWidgetItem,
+    QProgressBar,
 )
-from PySide6.QtCore import Qt
-from src.modules.merge import Merger
+from PySide6.QtCore import Qt, QThread, Signal
+from src.modules.merge import Merger, MergeCancelled
 from src.ui.widgets.drop_zone import DropZone
 
 
+class MergeWorker(QThread):
+    """Worker thread for merging."""
+    finished = Signal(dict)
+    error = Signal(str)
+    cancelled = Signal()
+    file_progress = Signal(int, int)
+    page_progress = Signal(int, int)
+
+    def __init__(self, input_files, output_file):
+        super().__init__()
+        self.input_files = list(input_files)
+        self.output_file = output_file
+        self.merger = Merger()
+        self._cancel_requested = False
+
+    def cancel(self):
+        # Each operation clears earlier cancels when it starts, so one asked for before then is kept here.
+        self._cancel_requested = True
+        self.merger.cancel()
+
+    def _on_progress(self, file_number, total_files, page_number, page_count):
+        if page_number == 0:
+            self.file_progress.emit(file_number, total_files)
+        self.page_progress.emit(page_number, page_count)
+
+    def run(self):
+        try:
+            with self.merger as merger:
+                if self._cancel_requested:
+                    raise MergeCancelled("Merge cancelled")
+                stats = merger.process(self.input_files, self.output_file, progress_callback=self._on_progress)
+            self.finished.emit(stats)
+        except MergeCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class ProbeWorker(QThread):
+    finished = Signal(list)
+
+    def __init__(self, input_files):
+        super().__init__()
+        self.input_files = list(input_files)
+
+    def run(self):
+        self.finished.emit(Merger.probe(self.input_files))
+
+
 class MergeView(QWidget):
     """Futuristic merge view."""
 
@@ -21,6 +73,11 @@ class MergeView(QWidget):
         super().__init__()
         self._on_back_click = on_back_click
         self.files = []
+        self.worker = None
+        self._current_file = (0, 0)
+        self.probe_reports = {}
+        self._file_rows = {}
+        self._probe_workers = []
         self._setup_ui()
         self._apply_styles()
 
@@ -61,6 +118,11 @@ class MergeView(QWidget):
         file_section = self._create_file_section()
         layout.addWidget(file_section, 1)
 
+        # Progress
+        self.progress_container = self._create_progress_section()
+        self.progress_container.hide()
+        layout.addWidget(self.progress_container)
+
         # Actions
         actions = self._create_actions()
         layout.addWidget(actions)
@@ -96,8 +158,15 @@ class MergeView(QWidget):
         drop_zone.filesDropped.connect(self._handle_dropped_files)
         layout.addWidget(drop_zone)
 
-        list_header = QLabel("SELECTED FILES")
-        list_header.setProperty("class", "list-header")
+        list_header = QWidget()
+        header_layout = QHBoxLayout(list_header)
+        header_layout.setContentsMargins(8, 0, 8, 0)
+        for text, width in (("SELECTED FILES", 0), ("PAGES", 70), ("STATUS", 110)):
+            label = QLabel(text)
+            label.setProperty("class", "list-header")
+            if width:
+                label.setFixedWidth(width)
+            header_layout.addWidget(label, 0 if width else 1)
         layout.addWidget(list_header)
 
         self.file_list = QListWidget()
@@ -109,6 +178,24 @@ class MergeView(QWidget):
 
         return container
 
+    def _create_progress_section(self):
+        """Create the merge progress section."""
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setObjectName("progressLabel")
+        layout.addWidget(self.progress_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setObjectName("progressBar")
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        return container
+
     def _create_actions(self):
         """Create the action buttons section."""
         container = QWidget()
@@ -129,6 +216,12 @@ class MergeView(QWidget):
 
         layout.addStretch()
 
+        self.cancel_btn = QPushButton("CANCEL")
+        self.cancel_btn.setProperty("class", "secondary-button")
+        self.cancel_btn.clicked.connect(self.cancel_merge)
+        self.cancel_btn.hide()
+        layout.addWidget(self.cancel_btn)
+
         self.merge_btn = QPushButton("🔗  MERGE PDFs")
         self.merge_btn.setProperty("class", "primary-button")
         self.merge_btn.clicked.connect(self.merge_files)
@@ -165,12 +258,65 @@ class MergeView(QWidget):
         if not files:
             self.add_files()
             return
+        added = []
         for file_path in files:
             if file_path not in self.files:
                 self.files.append(file_path)
-                item = QListWidgetItem(file_path)
-                self.file_list.addItem(item)
+                self._add_file_row(file_path)
+                added.append(file_path)
         self._update_button_states()
+        if added:
+            self._probe_files(added)
+
+    def _add_file_row(self, file_path):
+        """Add a list row showing the path with page-count and status columns."""
+        row = QWidget()
+        row.setObjectName("fileRow")
+        row_layout = QHBoxLayout(row)
+        row_layout.setContentsMargins(8, 4, 8, 4)
+
+        path_label = QLabel(file_path)
+        path_label.setObjectName("filePath")
+        row_layout.addWidget(path_label, 1)
+
+        pages_label = QLabel("…")
+        pages_label.setObjectName("filePages")
+        pages_label.setFixedWidth(70)
+        row_layout.addWidget(pages_label)
+
+        status_label = QLabel("Checking…")
+        status_label.setObjectName("fileStatus")
+        status_label.setFixedWidth(110)
+        row_layout.addWidget(status_label)
+
+        item = QListWidgetItem()
+        item.setSizeHint(row.sizeHint())
+        self.file_list.addItem(item)
+        self.file_list.setItemWidget(item, row)
+        self._file_rows[file_path] = (pages_label, status_label)
+
+    def _probe_files(self, files):
+        """Check new files in the background and fill in their columns."""
+        # Keep running probes referenced so they are not destroyed mid-run.
+        self._probe_workers = [worker for worker in self._probe_workers if worker.isRunning()]
+        worker = ProbeWorker(files)
+        worker.finished.connect(self._on_probe_finished)
+        self._probe_workers.append(worker)
+        worker.start()
+
+    def _on_probe_finished(self, reports):
+        for report in reports:
+            path = report["path"]
+            if path not in self._file_rows:
+                continue
+            self.probe_reports[path] = report
+            pages_label, status_label = self._file_rows[path]
+            pages_label.setText(str(report["page_count"]) if report["status"] == "ok" else "—")
+            status_label.setText(report["status"].upper())
+            status_label.setToolTip(report["error"])
+            status_label.setProperty("fileStatus", report["status"])
+            status_label.style().unpolish(status_label)
+            status_label.style().polish(status_label)
 
     def add_files(self):
         """Add PDF files to the list."""
@@ -186,7 +332,9 @@ class MergeView(QWidget):
         current_row = self.file_list.currentRow()
         if current_row >= 0:
             self.file_list.takeItem(current_row)
-            del self.files[current_row]
+            file_path = self.files.pop(current_row)
+            self._file_rows.pop(file_path, None)
+            self.probe_reports.pop(file_path, None)
             self._update_button_states()
 
     def _show_context_menu(self, position):
@@ -204,15 +352,28 @@ class MergeView(QWidget):
         self._hide_status()
         self.files.clear()
         self.file_list.clear()
+        self._file_rows.clear()
+        self.probe_reports.clear()
         self._update_button_states()
 
     def merge_files(self):
         """Merge the selected PDF files."""
         self._hide_status()
+        if self.worker:
+            return
         if len(self.files) < 2:
             self._show_status("⚠️ Please add at least 2 PDF files to merge.", "error")
             return
 
+        problems = [
+            f"{os.path.basename(path)} ({report['status']})"
+            for path in self.files
+            if (report := self.probe_reports.get(path)) and report["status"] != "ok"
+        ]
+        if problems:
+            self._show_status(f"⚠️ Cannot merge: {', '.join(problems)}", "error")
+            return
+
         output_file, _ = QFileDialog.getSaveFileName(
             self, "Save Merged PDF", "merged.pdf", "PDF Files (*.pdf)"
         )
@@ -223,18 +384,62 @@ class MergeView(QWidget):
         self.merge_btn.setEnabled(False)
         self.remove_btn.setEnabled(False)
         self.clear_btn.setEnabled(False)
-            
-        try:
-            with Merger() as merger:
-                merger.process(self.files, output_file)
-            self._show_status(f"✅ PDFs merged successfully! Saved to: {output_file}", "success")
-        except Exception as e:
-            self._show_status(f"❌ Failed to merge PDFs: {str(e)}", "error")
-        finally:
-            self.merge_btn.setText("🔗  MERGE PDFs")
-            self.merge_btn.setEnabled(True)
-            self.remove_btn.setEnabled(self.file_list.currentRow() >= 0)
-            self.clear_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.progress_bar.setRange(0, len(self.files))
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
+        self.progress_container.show()
+
+        self.output_file = output_file
+        self.worker = MergeWorker(self.files, output_file)
+        self.worker.file_progress.connect(self._on_file_progress)
+        self.worker.page_progress.connect(self._on_page_progress)
+        self.worker.finished.connect(self._on_merge_finished)
+        self.worker.error.connect(self._on_merge_error)
+        self.worker.cancelled.connect(self._on_merge_cancelled)
+        self.worker.start()
+
+    def cancel_merge(self):
+        """Stop the running merge after the current page."""
+        if self.worker:
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+            self.worker.cancel()
+
+    def _on_file_progress(self, file_number, total_files):
+        self.progress_bar.setValue(file_number - 1)
+        self._current_file = (file_number, total_files)
+        if self.cancel_btn.isEnabled():
+            self.progress_label.setText(f"File {file_number} of {total_files}")
+
+    def _on_page_progress(self, page_number, page_count):
+        # Keep "Cancelling..." on screen once the user has asked to stop.
+        if not page_count or not self.cancel_btn.isEnabled():
+            return
+        file_number, total_files = self._current_file
+        self.progress_label.setText(f"File {file_number} of {total_files} · page {page_number} of {page_count}")
+
+    def _on_merge_finished(self, stats):
+        self._reset_after_merge()
+        self._show_status(f"✅ PDFs merged successfully! Saved to: {self.output_file}", "success")
+
+    def _on_merge_error(self, error_msg):
+        self._reset_after_merge()
+        self._show_status(f"❌ Failed to merge PDFs: {error_msg}", "error")
+
+    def _on_merge_cancelled(self):
+        self._reset_after_merge()
+        self._show_status("⚠️ Merge cancelled. No output file was written.", "error")
+
+    def _reset_after_merge(self):
+        self.worker = None
+        self.progress_container.hide()
+        self.cancel_btn.hide()
+        self.merge_btn.setText("🔗  MERGE PDFs")
+        self.merge_btn.setEnabled(True)
+        self.remove_btn.setEnabled(self.file_list.currentRow() >= 0)
+        self.clear_btn.setEnabled(True)
 
     def _apply_styles(self):
         """Apply futuristic styles to merge view."""
@@ -354,6 +559,48 @@ class MergeView(QWidget):
                 color: #6c757d;
             }
             
+            QWidget#fileRow {
+                background: transparent;
+            }
+            
+            QLabel#filePath, QLabel#filePages {
+                color: #8892b0;
+                background: transparent;
+            }
+            
+            QLabel#fileStatus {
+                color: #8892b0;
+                background: transparent;
+                font-weight: 600;
+            }
+            
+            QLabel#fileStatus[fileStatus="ok"] {
+                color: #00ff7f;
+            }
+            
+            QLabel#fileStatus[fileStatus="missing"], QLabel#fileStatus[fileStatus="invalid"],
+            QLabel#fileStatus[fileStatus="encrypted"], QLabel#fileStatus[fileStatus="corrupt"] {
+                color: #ff4757;
+            }
+            
+            QLabel#progressLabel {
+                font-size: 12px;
+                color: #8892b0;
+            }
+            
+            QProgressBar#progressBar {
+                background: #0a0e27;
+                border: 1px solid #00d9ff;
+                border-radius: 4px;
+                max-height: 8px;
+            }
+            
+            QProgressBar#progressBar::chunk {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #00d9ff, stop:1 #7b2cbf);
+                border-radius: 4px;
+            }
+            
             QWidget#statusContainer {
                 background: rgba(0, 217, 255, 0.15);
                 border: 1px solid #00d9ff;
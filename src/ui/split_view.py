@@ -1,13 +1,54 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog,
-    QLabel, QFrame, QSpinBox, QSlider
+    QLabel, QFrame, QSpinBox, QSlider, QCheckBox, QProgressBar
 )
-from PySide6.QtCore import Qt
-from src.modules.split import Splitter
+from PySide6.QtCore import Qt, QThread, Signal
+from src.modules.split import SplitCancelled, Splitter
 from src.modules.pdf_utils import get_pdf_info
 from src.ui.widgets.drop_zone import DropZone
 
 
+class SplitWorker(QThread):
+    """Worker thread for splitting."""
+    finished = Signal(list)
+    error = Signal(str)
+    cancelled = Signal(list)
+    part_progress = Signal(int, int)
+
+    def __init__(self, input_file, output_dir, pages_per_file=1, max_bytes=None):
+        super().__init__()
+        self.output_dir = output_dir
+        self.pages_per_file = pages_per_file
+        self.max_bytes = max_bytes
+        self.splitter = Splitter(input_file)
+        self._cancel_requested = False
+
+    def cancel(self):
+        # Each operation clears earlier cancels when it starts, so one asked for before then is kept here.
+        self._cancel_requested = True
+        self.splitter.cancel()
+
+    def run(self):
+        try:
+            with self.splitter as splitter:
+                if self._cancel_requested:
+                    raise SplitCancelled("Split cancelled")
+                if self.max_bytes:
+                    splitter.split_by_size(self.output_dir, self.max_bytes, progress_callback=self.part_progress.emit)
+                else:
+                    splitter.split_by_pages(
+                        self.output_dir,
+                        self.pages_per_file,
+                        prune_resources=True,
+                        progress_callback=self.part_progress.emit,
+                    )
+            self.finished.emit(self.splitter.part_stats)
+        except SplitCancelled:
+            self.cancelled.emit(self.splitter.part_stats)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class SplitView(QWidget):
     """Futuristic split PDF view."""
 
@@ -16,6 +57,8 @@ class SplitView(QWidget):
         self._on_back_click = on_back_click
         self.input_file = None
         self.total_pages = 0
+        self.output_dir = None
+        self.worker = None
         self._setup_ui()
         self._apply_styles()
 
@@ -61,6 +104,11 @@ class SplitView(QWidget):
         self.options_section.setEnabled(False)
         layout.addWidget(self.options_section)
 
+        # Progress
+        self.progress_container = self._create_progress_section()
+        self.progress_container.hide()
+        layout.addWidget(self.progress_container)
+
         # Actions
         self.actions_section = self._create_actions()
         self.actions_section.setEnabled(False)
@@ -162,6 +210,45 @@ class SplitView(QWidget):
         self.pages_slider.valueChanged.connect(self._sync_spinbox_from_slider)
         layout.addWidget(self.pages_slider)
 
+        # Split: Maximum file size option
+        size_container = QHBoxLayout()
+        size_container.setSpacing(12)
+
+        self.size_checkbox = QCheckBox("Split by maximum file size instead:")
+        self.size_checkbox.setObjectName("optionCheck")
+        self.size_checkbox.toggled.connect(self._on_size_mode_toggled)
+        size_container.addWidget(self.size_checkbox)
+
+        self.size_spinbox = QSpinBox()
+        self.size_spinbox.setMinimum(1)
+        self.size_spinbox.setMaximum(10000)
+        self.size_spinbox.setValue(10)
+        self.size_spinbox.setSuffix(" MB")
+        self.size_spinbox.setFixedWidth(120)
+        self.size_spinbox.setEnabled(False)
+        size_container.addWidget(self.size_spinbox)
+        size_container.addStretch()
+
+        layout.addLayout(size_container)
+
+        return container
+
+    def _create_progress_section(self):
+        """Create the split progress section."""
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setObjectName("progressLabel")
+        layout.addWidget(self.progress_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setObjectName("progressBar")
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+
         return container
 
     def _create_actions(self):
@@ -170,13 +257,19 @@ class SplitView(QWidget):
         layout = QHBoxLayout(container)
         layout.setSpacing(16)
 
-        clear_btn = QPushButton("CLEAR")
-        clear_btn.setProperty("class", "secondary-button")
-        clear_btn.clicked.connect(self.clear_file)
-        layout.addWidget(clear_btn)
+        self.clear_btn = QPushButton("CLEAR")
+        self.clear_btn.setProperty("class", "secondary-button")
+        self.clear_btn.clicked.connect(self.clear_file)
+        layout.addWidget(self.clear_btn)
 
         layout.addStretch()
 
+        self.cancel_btn = QPushButton("CANCEL")
+        self.cancel_btn.setProperty("class", "secondary-button")
+        self.cancel_btn.clicked.connect(self.cancel_split)
+        self.cancel_btn.hide()
+        layout.addWidget(self.cancel_btn)
+
         self.split_btn = QPushButton("✂️  SPLIT PDF")
         self.split_btn.setProperty("class", "primary-button")
         self.split_btn.clicked.connect(self.split_file)
@@ -208,6 +301,12 @@ class SplitView(QWidget):
         self.pages_spinbox.setValue(value)
         self.pages_spinbox.blockSignals(False)
 
+    def _on_size_mode_toggled(self, checked):
+        """Switch between splitting by page count and by file size."""
+        self.size_spinbox.setEnabled(checked)
+        self.pages_spinbox.setEnabled(not checked)
+        self.pages_slider.setEnabled(not checked)
+
     def _handle_dropped_file(self, files):
         """Handle file dropped into drop zone."""
         self._hide_status()
@@ -263,6 +362,7 @@ class SplitView(QWidget):
         self.pages_slider.setMaximum(1)
         self.pages_slider.setValue(1)
         self.page_range_label.setText("(Max: 1)")
+        self.size_checkbox.setChecked(False)
         self.drop_zone.show()
         self.file_info_container.hide()
         self.options_section.setEnabled(False)
@@ -271,6 +371,8 @@ class SplitView(QWidget):
     def split_file(self):
         """Split the PDF file."""
         self._hide_status()
+        if self.worker:
+            return
         if not self.input_file:
             self._show_status("⚠️ Please select a PDF file to split.", "error")
             return
@@ -281,19 +383,61 @@ class SplitView(QWidget):
         
         self.split_btn.setText("⏳ Splitting...")
         self.split_btn.setEnabled(False)
+        self.clear_btn.setEnabled(False)
         self.options_section.setEnabled(False)
-            
-        try:
-            with Splitter(self.input_file) as splitter:
-                pages_per_file = self.pages_spinbox.value()
-                file_count = splitter.split_by_pages(output_dir, pages_per_file)
-            self._show_status(f"✅ PDF split successfully! Created {file_count} files in: {output_dir}", "success")
-        except Exception as e:
-            self._show_status(f"❌ Failed to split PDF: {str(e)}", "error")
-        finally:
-            self.split_btn.setText("✂️  SPLIT PDF")
-            self.split_btn.setEnabled(True)
-            self.options_section.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        # Busy until the first part reports how many there are.
+        self.progress_bar.setRange(0, 0)
+        self.progress_label.setText("")
+        self.progress_container.show()
+
+        max_bytes = self.size_spinbox.value() * 1024 * 1024 if self.size_checkbox.isChecked() else None
+        self.output_dir = output_dir
+        self.worker = SplitWorker(self.input_file, output_dir, self.pages_spinbox.value(), max_bytes)
+        self.worker.part_progress.connect(self._on_part_progress)
+        self.worker.finished.connect(self._on_split_finished)
+        self.worker.error.connect(self._on_split_error)
+        self.worker.cancelled.connect(self._on_split_cancelled)
+        self.worker.start()
+
+    def cancel_split(self):
+        """Stop the running split after the current part."""
+        if self.worker:
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+            self.worker.cancel()
+
+    def _on_part_progress(self, part_number, total_parts):
+        self.progress_bar.setRange(0, total_parts)
+        self.progress_bar.setValue(part_number)
+        if self.cancel_btn.isEnabled():
+            self.progress_label.setText(f"Part {part_number} of {total_parts} written")
+
+    def _on_split_finished(self, part_stats):
+        self._reset_after_split()
+        self._show_status(
+            f"✅ PDF split successfully! Created {len(part_stats)} files in: {self.output_dir}", "success"
+        )
+
+    def _on_split_error(self, error_msg):
+        self._reset_after_split()
+        self._show_status(f"❌ Failed to split PDF: {error_msg}", "error")
+
+    def _on_split_cancelled(self, part_stats):
+        self._reset_after_split()
+        self._show_status(
+            f"⚠️ Split cancelled. {len(part_stats)} files were written to: {self.output_dir}", "error"
+        )
+
+    def _reset_after_split(self):
+        self.worker = None
+        self.progress_container.hide()
+        self.cancel_btn.hide()
+        self.split_btn.setText("✂️  SPLIT PDF")
+        self.split_btn.setEnabled(True)
+        self.clear_btn.setEnabled(True)
+        self.options_section.setEnabled(True)
 
     def _apply_styles(self):
         """Apply futuristic styles to split view."""
@@ -353,6 +497,43 @@ class SplitView(QWidget):
                 margin-top: 4px;
             }
             
+            QCheckBox#optionCheck {
+                color: #8892b0;
+                font-size: 13px;
+                spacing: 8px;
+            }
+            
+            QCheckBox#optionCheck::indicator {
+                width: 20px;
+                height: 20px;
+                border: 2px solid #00d9ff;
+                border-radius: 4px;
+                background: #0a0e27;
+            }
+            
+            QCheckBox#optionCheck::indicator:checked {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #00d9ff, stop:1 #00b8d4);
+            }
+            
+            QLabel#progressLabel {
+                font-size: 12px;
+                color: #8892b0;
+            }
+            
+            QProgressBar#progressBar {
+                background: #0a0e27;
+                border: 1px solid #00d9ff;
+                border-radius: 4px;
+                max-height: 8px;
+            }
+            
+            QProgressBar#progressBar::chunk {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #00d9ff, stop:1 #7b2cbf);
+                border-radius: 4px;
+            }
+            
             QLabel#pageRangeLabel {
                 font-size: 11px;
                 color: #8892b0;
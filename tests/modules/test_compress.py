@@ -1,8 +1,15 @@
 import pytest
+import io
 import os
+import random
 from pathlib import Path
-from pypdf import PdfReader
-from src.modules.compress import Compressor
+import pdfplumber
+import pikepdf
+from PIL import Image, ImageDraw, ImageFont
+from PIL.JpegImagePlugin import JpegImageFile
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject
+from src.modules.compress import Compressor, _classify_image, _effective_dpis
 
 
 @pytest.fixture
@@ -11,6 +18,17 @@ def test_data_dir():
     return Path(__file__).parent.parent / "data"
 
 
+def _jpeg_xobject(pdf, size, color, quality=75):
+    """Return an RGB JPEG image XObject of ``size`` filled with ``color``, or of ``color`` itself if it is an image."""
+    image = color if isinstance(color, Image.Image) else Image.new("RGB", size, color)
+    data = io.BytesIO()
+    image.save(data, format="JPEG", quality=quality)
+    return pdf.make_stream(
+        data.getvalue(), Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image, Width=image.width,
+        Height=image.height, ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8, Filter=pikepdf.Name.DCTDecode,
+    )
+
+
 def test_compress_basic(tmp_path, test_data_dir):
     """Test basic PDF compression."""
     output_path = tmp_path / "compressed.pdf"
@@ -149,3 +167,401 @@ def test_get_compression_levels():
     assert "low" in levels
     assert "medium" in levels
     assert "high" in levels
+
+
+def test_compress_parallel_matches_serial(tmp_path, test_data_dir):
+    """Test that recompressing images on several threads gives the same images."""
+    serial_path = tmp_path / "serial.pdf"
+    parallel_path = tmp_path / "parallel.pdf"
+    with Compressor(str(test_data_dir / "mixed_content.pdf")) as compressor:
+        compressor.compress(str(serial_path), level="high")
+        compressor.compress(str(parallel_path), level="high", workers=4)
+
+    def image_data(path):
+        return [
+            image.get_object()._data
+            for page in PdfReader(str(path)).pages
+            for image in page["/Resources"].get("/XObject", {}).values()
+        ]
+
+    assert image_data(parallel_path) == image_data(serial_path)
+
+
+def test_compress_reports_image_progress(tmp_path, test_data_dir):
+    """Test that progress is reported once per recompressed image."""
+    calls = []
+    with Compressor(str(test_data_dir / "images.pdf")) as compressor:
+        compressor.compress(
+            str(tmp_path / "compressed.pdf"), progress_callback=lambda *args: calls.append(args), workers=2
+        )
+
+    assert calls == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_compress_resized_image_dimensions(tmp_path, test_data_dir):
+    """Test that resized images are stored with their new dimensions."""
+    output_path = tmp_path / "compressed.pdf"
+    with Compressor(str(test_data_dir / "images.pdf")) as compressor:
+        compressor.compress(str(output_path), level="high")
+
+    image = PdfReader(str(output_path)).pages[0].images[0]
+    stream = image.indirect_reference.get_object()
+    assert image.image.size == (200, 150)
+    assert (stream["/Width"], stream["/Height"]) == (200, 150)
+
+
+@pytest.fixture
+def shared_images_pdf(tmp_path):
+    """A PDF whose logo is shared by every page, plus images inside a form and a tiling pattern."""
+    pdf = pikepdf.new()
+    logo, green, blue = (_jpeg_xobject(pdf, (200, 100), color) for color in ("red", "green", "blue"))
+    form = pdf.make_stream(
+        b"q 200 0 0 100 0 0 cm /Im0 Do Q", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form,
+        BBox=[0, 0, 200, 100], Resources=pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=green)),
+    )
+    pattern = pdf.make_stream(
+        b"q 200 0 0 100 0 0 cm /Im0 Do Q", PatternType=1, PaintType=1, TilingType=1, BBox=[0, 0, 200, 100],
+        XStep=200, YStep=100, Resources=pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=blue)),
+    )
+    for _ in range(3):
+        pdf.add_blank_page(page_size=(612, 792))
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary(Logo=logo, Fm0=form), Pattern=pikepdf.Dictionary(P0=pattern)
+        )
+        page.Contents = pdf.make_stream(
+            b"q 200 0 0 100 0 0 cm /Logo Do Q /Fm0 Do /Pattern cs /P0 scn 0 200 612 200 re f"
+        )
+    path = tmp_path / "shared_images.pdf"
+    pdf.save(path)
+    return path
+
+
+def test_compress_shared_images_once(tmp_path, shared_images_pdf):
+    """Test that a shared image is recompressed once and nested images are reached."""
+    calls = []
+    output_path = tmp_path / "compressed.pdf"
+    with Compressor(str(shared_images_pdf)) as compressor:
+        compressor.compress(str(output_path), level="high", progress_callback=lambda *args: calls.append(args))
+
+    assert calls == [(1, 3), (2, 3), (3, 3)]
+    with pikepdf.open(output_path) as pdf:
+        logos = {page.Resources.XObject.Logo.objgen for page in pdf.pages}
+        page = pdf.pages[0]
+        nested = [page.Resources.XObject.Fm0.Resources.XObject.Im0, page.Resources.Pattern.P0.Resources.XObject.Im0]
+        assert len(logos) == 1
+        for image in [page.Resources.XObject.Logo, *nested]:
+            assert (image.Width, image.Height) == (100, 50)
+
+
+@pytest.fixture
+def placed_images_pdf(tmp_path):
+    """A page with a 600 px image drawn one inch wide inside a scaled form, and a 100 px image two inches wide."""
+    pdf = pikepdf.new()
+    scan, thumb = _jpeg_xobject(pdf, (600, 600), "purple"), _jpeg_xobject(pdf, (100, 100), "purple")
+    form = pdf.make_stream(
+        b"q 144 0 0 144 0 0 cm /Scan Do Q", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form,
+        BBox=[0, 0, 144, 144], Matrix=[0.5, 0, 0, 0.5, 0, 0],
+        Resources=pikepdf.Dictionary(XObject=pikepdf.Dictionary(Scan=scan)),
+    )
+    pdf.add_blank_page(page_size=(612, 792))
+    page = pdf.pages[0]
+    page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Fm0=form, Thumb=thumb))
+    page.Contents = pdf.make_stream(b"q 1 0 0 1 100 100 cm /Fm0 Do Q q 144 0 0 144 300 300 cm /Thumb Do Q")
+    path = tmp_path / "placed_images.pdf"
+    pdf.save(path)
+    return path
+
+
+def test_compress_target_dpi(tmp_path, placed_images_pdf):
+    """Test that only images above the target resolution are downsampled, to that resolution."""
+    output_path = tmp_path / "compressed.pdf"
+    with Compressor(str(placed_images_pdf)) as compressor:
+        stats = compressor.compress(str(output_path), target_dpi=150)
+
+    decisions = {decision["width"]: decision for decision in stats["images"]}
+    assert decisions[600]["dpi"] == pytest.approx(600)
+    assert decisions[600]["scale"] == pytest.approx(0.25)
+    assert decisions[600]["downsampled"]
+    assert decisions[100]["dpi"] == pytest.approx(50)
+    assert decisions[100]["scale"] == 1.0
+    assert not decisions[100]["downsampled"]
+    with pikepdf.open(output_path) as pdf:
+        page = pdf.pages[0]
+        assert page.Resources.XObject.Fm0.Resources.XObject.Scan.Width == 150
+        assert page.Resources.XObject.Thumb.Width == 100
+
+
+def test_effective_dpis_survives_odd_content():
+    """Test that self-drawing patterns, forms without resources and broken streams are measured safely."""
+    pdf = pikepdf.new()
+    tiled, inherited, broken = (_jpeg_xobject(pdf, (size, size), "black") for size in (300, 200, 100))
+    pattern = pdf.make_indirect(pdf.make_stream(
+        b"q 72 0 0 72 0 0 cm /Tile Do Q", Type=pikepdf.Name.Pattern, PatternType=1, PaintType=1, TilingType=1,
+        BBox=[0, 0, 72, 72], XStep=72, YStep=72,
+    ))
+    pattern.Resources = pikepdf.Dictionary(
+        XObject=pikepdf.Dictionary(Tile=tiled), Pattern=pikepdf.Dictionary(P0=pattern)
+    )
+    bare_form = pdf.make_stream(
+        b"q 144 0 0 144 0 0 cm /Inherited Do Q", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form,
+        BBox=[0, 0, 144, 144],
+    )
+    broken_form = pdf.make_stream(
+        b"/Oops 0 0 1 0 0 cm /Broken Do", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form, BBox=[0, 0, 72, 72],
+        Resources=pikepdf.Dictionary(XObject=pikepdf.Dictionary(Broken=broken)),
+    )
+    pdf.add_blank_page(page_size=(612, 792))
+    page = pdf.pages[0]
+    page.Resources = pikepdf.Dictionary(
+        XObject=pikepdf.Dictionary(Bare=bare_form, Inherited=inherited, Fm1=broken_form, Broken=broken),
+        Pattern=pikepdf.Dictionary(P0=pattern),
+    )
+    page.Contents = pdf.make_stream(b"/Bare Do /Fm1 Do q 72 0 0 72 0 0 cm /Broken Do Q")
+
+    dpis = _effective_dpis(pdf)
+    assert dpis[tiled.objgen] == pytest.approx(300)
+    assert dpis[inherited.objgen] == pytest.approx(100)
+    # Also drawn by a stream that could not be replayed, so its resolution is unknown.
+    assert broken.objgen not in dpis
+
+
+def test_compress_uses_jpeg_draft_decoding(tmp_path, test_data_dir, monkeypatch):
+    """Test that JPEG images halved or more are decoded at reduced scale."""
+    requests = []
+    draft = JpegImageFile.draft
+
+    def spy(image, mode, size):
+        requests.append(size)
+        return draft(image, mode, size)
+
+    monkeypatch.setattr(JpegImageFile, "draft", spy)
+    with Compressor(str(test_data_dir / "images.pdf")) as compressor:
+        compressor.compress(str(tmp_path / "high.pdf"), level="high")
+        assert requests == [(200, 150)] * 3
+        compressor.compress(str(tmp_path / "medium.pdf"), level="medium")
+        assert len(requests) == 3
+
+
+@pytest.fixture
+def photos_pdf(tmp_path):
+    """A PDF of six pages, each showing a different high-quality noisy photo."""
+    pdf = pikepdf.new()
+    for number in range(6):
+        noise = Image.effect_noise((600, 600), 20 + 10 * number).convert("RGB")
+        image = _jpeg_xobject(pdf, noise.size, noise, quality=95)
+        pdf.add_blank_page(page_size=(612, 792))
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+        page.Contents = pdf.make_stream(b"q 600 0 0 600 6 96 cm /Im0 Do Q")
+    path = tmp_path / "photos.pdf"
+    pdf.save(path)
+    return path
+
+
+def test_compress_to_target_size(tmp_path, photos_pdf):
+    """Test that a target size is met in at most two passes."""
+    target = os.path.getsize(photos_pdf) // 4
+    with Compressor(str(photos_pdf)) as compressor:
+        stats = compressor.compress(str(tmp_path / "compressed.pdf"), target_bytes=target)
+
+    assert stats["compressed_size"] <= target
+    assert stats["passes"] in (1, 2)
+    assert stats["quality"] < 85
+
+
+def test_compress_generous_target_keeps_quality(tmp_path, photos_pdf):
+    """Test that a target the file already fits in keeps the mildest settings."""
+    with Compressor(str(photos_pdf)) as compressor:
+        stats = compressor.compress(str(tmp_path / "compressed.pdf"), target_bytes=os.path.getsize(photos_pdf))
+
+    assert (stats["quality"], stats["scale"], stats["passes"]) == (85, 1.0, 1)
+    assert not any(image["downsampled"] for image in stats["images"])
+
+
+def test_compress_invalid_target_size(tmp_path, photos_pdf):
+    """Test that a target size must be positive."""
+    with Compressor(str(photos_pdf)) as compressor:
+        with pytest.raises(ValueError):
+            compressor.compress(str(tmp_path / "compressed.pdf"), target_bytes=0)
+
+
+@pytest.fixture
+def bloated_pdf(tmp_path):
+    """A PDF carrying everything the lossless profile removes, plus an image it must leave alone."""
+    pdf = pikepdf.new()
+    image = _jpeg_xobject(pdf, (64, 64), "orange")
+    profile = bytes(range(256)) * 16
+    script = pdf.make_indirect(pikepdf.Dictionary(S=pikepdf.Name.JavaScript, JS=pikepdf.String("app.alert('hi');")))
+    pdf.Root.OpenAction = script
+    pdf.Root.Names = pikepdf.Dictionary(JavaScript=pikepdf.Dictionary(Names=["hello", script]))
+    for _ in range(2):
+        pdf.add_blank_page(page_size=(612, 792))
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary(Im0=image),
+            ColorSpace=pikepdf.Dictionary(CS0=[pikepdf.Name.ICCBased, pdf.make_stream(profile, N=3)]),
+        )
+        page.Contents = pdf.make_stream(b"q 64 0 0 64 0 0 cm /Im0 Do Q\n" + b"0 0 m 10 10 l S\n" * 500)
+        page.Thumb = pdf.make_stream(bytes(3000), Width=10, Height=100, ColorSpace=pikepdf.Name.DeviceRGB,
+                                     BitsPerComponent=8)
+        page.Metadata = pdf.make_stream(b"<x:xmpmeta>" + b" " * 2000 + b"</x:xmpmeta>",
+                                        Type=pikepdf.Name.Metadata, Subtype=pikepdf.Name.XML)
+        page.Annots = [pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Annot, Subtype=pikepdf.Name.Link, Rect=[0, 0, 10, 10], A=script,
+        ))]
+        page.AA = pikepdf.Dictionary(O=script)
+        page.Resources.Properties = pikepdf.Dictionary(Copy=pdf.make_stream(b"same bytes " * 200))
+    source = tmp_path / "source.pdf"
+    pdf.save(source, compress_streams=False)
+
+    # pikepdf never writes unreachable objects, so add an orphan with pypdf.
+    writer = PdfWriter(clone_from=str(source))
+    orphan = DecodedStreamObject()
+    orphan.set_data(b"nobody refers to me " * 100)
+    writer._add_object(orphan)
+    path = tmp_path / "bloated.pdf"
+    writer.write(str(path))
+    return path
+
+
+def test_compress_lossless(tmp_path, bloated_pdf):
+    """Test that the lossless profile reports savings per step and leaves images untouched."""
+    output_path = tmp_path / "compressed.pdf"
+    with Compressor(str(bloated_pdf)) as compressor:
+        stats = compressor.compress(str(output_path), level="lossless")
+
+    savings = stats["savings"]
+    assert list(savings) == [
+        "orphaned_objects", "reserialization", "thumbnails", "metadata", "javascript", "duplicate_icc_profiles",
+        "duplicate_streams", "flate", "object_streams",
+    ]
+    for step in savings:
+        if step != "reserialization":
+            assert savings[step] > 0, step
+    assert sum(savings.values()) == stats["original_size"] - stats["compressed_size"]
+    assert stats["images"] == []
+
+    with pikepdf.open(bloated_pdf) as original, pikepdf.open(output_path) as pdf:
+        assert len(pdf.pages) == 2
+        before = original.pages[0].Resources.XObject.Im0
+        after = pdf.pages[0].Resources.XObject.Im0
+        assert after.read_raw_bytes() == before.read_raw_bytes()
+        assert "/OpenAction" not in pdf.Root
+        assert "/JavaScript" not in pdf.Root.Names
+        assert "/A" not in pdf.pages[0].Annots[0]
+        assert all("/Thumb" not in page and "/Metadata" not in page for page in pdf.pages)
+        profiles = {page.Resources.ColorSpace.CS0[1].objgen for page in pdf.pages}
+        assert len(profiles) == 1
+
+
+def test_compress_lossless_reports_reserialization_overhead(tmp_path, test_data_dir):
+    """Test that growth from re-serializing a file is reported on its own, so the savings add up."""
+    with Compressor(str(test_data_dir / "heavy_mixed.pdf")) as compressor:
+        stats = compressor.compress(str(tmp_path / "compressed.pdf"), level="lossless")
+
+    savings = stats["savings"]
+    assert savings["orphaned_objects"] == 0
+    assert savings["reserialization"] < 0
+    assert all(saved >= 0 for step, saved in savings.items() if step != "reserialization")
+    assert sum(savings.values()) == stats["original_size"] - stats["compressed_size"]
+
+
+def test_compress_lossless_icc_profiles_are_colour_space_streams(tmp_path):
+    """Test that only streams used by /ICCBased colour spaces count as ICC profiles."""
+    pdf = pikepdf.new()
+    for _ in range(2):
+        pdf.add_blank_page()
+        page = pdf.pages[-1]
+        # A stream with /N that is not a colour profile.
+        lookalike = pdf.make_stream(
+            b"q Q", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form, BBox=[0, 0, 1, 1], N=3,
+        )
+        profile = pdf.make_stream(b"fake profile " * 50, N=3)
+        page.Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary(Fm0=lookalike),
+            ColorSpace=pikepdf.Dictionary(CS0=pikepdf.Array([pikepdf.Name.ICCBased, profile])),
+        )
+    path = tmp_path / "profiles.pdf"
+    pdf.save(path, compress_streams=False)
+
+    with Compressor(str(path)) as compressor:
+        savings = compressor.compress(str(tmp_path / "compressed.pdf"), level="lossless")["savings"]
+
+    assert savings["duplicate_icc_profiles"] >= len(b"fake profile " * 50)
+    assert 0 < savings["duplicate_streams"] < len(b"fake profile " * 50)
+
+
+def test_lossless_is_a_compression_level():
+    """Test that the lossless profile is offered as a level."""
+    assert "lossless" in Compressor.get_compression_levels()
+
+
+@pytest.fixture
+def scanned_pages_pdf(tmp_path):
+    """A PDF with a colour photo, a gray photo and a black-and-white page of text, all stored as RGB JPEG."""
+    color = Image.merge("RGB", [Image.effect_noise((400, 400), 40) for _ in range(3)])
+    gray = Image.effect_noise((400, 400), 40).convert("RGB")
+    scan = Image.new("RGB", (1240, 1754), "white")
+    draw = ImageDraw.Draw(scan)
+    font = ImageFont.load_default(size=24)
+    words = random.Random(1)
+    for row in range(60, 1694, 36):
+        line = "".join(words.choice("abcdefghijklmnopqrstuvwxyz     ") for _ in range(80))
+        draw.text((60, row), line, fill="black", font=font)
+
+    pdf = pikepdf.new()
+    for name, image in (("Color", color), ("Gray", gray), ("Scan", scan)):
+        pdf.add_blank_page(page_size=(400, 400))
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary({f"/{name}": _jpeg_xobject(pdf, image.size, image, quality=90)})
+        )
+        page.Contents = pdf.make_stream(f"q 400 0 0 400 0 0 cm /{name} Do Q".encode())
+    path = tmp_path / "scanned_pages.pdf"
+    pdf.save(path)
+    return path
+
+
+def test_compress_detects_gray_and_bilevel_images(tmp_path, scanned_pages_pdf):
+    """Test that gray images become gray JPEG and black-and-white scans one bit per pixel."""
+    output_path = tmp_path / "compressed.pdf"
+    with Compressor(str(scanned_pages_pdf)) as compressor:
+        stats = compressor.compress(str(output_path), level="low")
+
+    assert [image["encoding"] for image in stats["images"]] == ["rgb", "gray", "ccitt"]
+    with pikepdf.open(output_path) as pdf:
+        names = ("/Color", "/Gray", "/Scan")
+        color, gray, scan = (page.Resources.XObject[name] for page, name in zip(pdf.pages, names, strict=True))
+        assert (color.ColorSpace, color.BitsPerComponent) == ("/DeviceRGB", 8)
+        assert (gray.ColorSpace, gray.BitsPerComponent, gray.Filter) == ("/DeviceGray", 8, "/DCTDecode")
+        assert (scan.ColorSpace, scan.BitsPerComponent, scan.Filter) == ("/DeviceGray", 1, "/CCITTFaxDecode")
+
+    # Inverted CCITT data would render as white text on black.
+    with pdfplumber.open(output_path) as pdf:
+        histogram = pdf.pages[2].to_image(resolution=72).original.convert("L").histogram()
+    assert sum(histogram[192:]) > 0.8 * sum(histogram)
+    assert sum(histogram[:64]) > 0.01 * sum(histogram)
+
+
+def test_pale_images_are_not_bilevel():
+    """Test that pale gradients and faint tinted scans stay gray instead of being thresholded."""
+    gradient = Image.linear_gradient("L").resize((400, 400)).point(lambda value: 200 + value * 55 // 255)
+    tinted = Image.new("RGB", (400, 400), (215, 215, 215))
+    ImageDraw.Draw(tinted).text((20, 20), "faint pencil notes " * 4, fill=(150, 150, 150))
+    text = Image.new("L", (400, 400), 255)
+    ImageDraw.Draw(text).text((20, 20), "printed text " * 6, fill=0)
+
+    assert _classify_image(gradient)[1] == "gray"
+    assert _classify_image(tinted)[1] == "gray"
+    assert _classify_image(text)[1] == "bilevel"
+
+
+def test_compress_bilevel_scan_is_smaller(tmp_path, scanned_pages_pdf):
+    """Test that a black-and-white scan stored as one bit per pixel is far smaller than its JPEG."""
+    with Compressor(str(scanned_pages_pdf)) as compressor:
+        stats = compressor.compress(str(tmp_path / "compressed.pdf"), level="low")
+
+    with pikepdf.open(scanned_pages_pdf) as pdf:
+        original = len(pdf.pages[2].Resources.XObject.Scan.read_raw_bytes())
+    assert stats["images"][2]["bytes"] < original / 4
@@ -1,7 +1,7 @@
 import pytest
 from pathlib import Path
 from pypdf import PdfReader
-from src.modules.merge import Merger
+from src.modules.merge import Merger, MergeCancelled
 
 
 @pytest.fixture
@@ -119,3 +119,309 @@ class TestMerger:
         with Merger() as merger:
             merger.process(files, str(tmp_output))
         assert count_pages(str(tmp_output)) == sum(count_pages(f) for f in files)
+
+    def test_streaming_merge(self, tmp_output, test_data_dir):
+        files = [
+            str(test_data_dir / "with_notes.pdf"),
+            str(test_data_dir / "scan_like.pdf"),
+            str(test_data_dir / "with_forms.pdf"),
+            str(test_data_dir / "mixed_content.pdf"),
+        ]
+        with Merger() as merger:
+            merger.process(files, str(tmp_output), streaming=True)
+        reader = PdfReader(str(tmp_output), strict=True)
+        assert len(reader.pages) == sum(count_pages(f) for f in files)
+
+    def test_streaming_preserves_page_order(self, tmp_output, test_data_dir):
+        files = [str(test_data_dir / "landscape.pdf"), str(test_data_dir / "a6size.pdf")]
+        with Merger() as merger:
+            merger.process(files, str(tmp_output), streaming=True)
+        merged = PdfReader(str(tmp_output)).pages
+        expected = [page for f in files for page in PdfReader(f).pages]
+        assert [p.mediabox.width for p in merged] == [p.mediabox.width for p in expected]
+
+    def test_streaming_output_is_an_input(self, tmp_path, test_data_dir):
+        target = tmp_path / "target.pdf"
+        target.write_bytes((test_data_dir / "sample.pdf").read_bytes())
+        with Merger() as merger:
+            merger.process([str(target), str(test_data_dir / "sample.pdf")], str(target), streaming=True)
+        assert count_pages(str(target)) == 2 * count_pages(str(test_data_dir / "sample.pdf"))
+
+    def test_streaming_failure_leaves_no_output(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            with pytest.raises(FileNotFoundError):
+                merger.process(
+                    [str(test_data_dir / "sample.pdf"), str(test_data_dir / "does_not_exist.pdf")],
+                    str(tmp_output),
+                    streaming=True,
+                )
+        assert list(tmp_output.parent.iterdir()) == []
+
+    def test_process_returns_stats(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            stats = merger.process([str(test_data_dir / "sample.pdf"), str(test_data_dir / "blank.pdf")], str(tmp_output))
+        assert stats["page_count"] == count_pages(str(tmp_output))
+        assert stats["output_size"] == tmp_output.stat().st_size
+        assert stats["duplicates_removed"] == 0
+        assert stats["bytes_saved"] == 0
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_dedupe_shared_resources(self, tmp_path, test_data_dir, streaming):
+        files = [str(test_data_dir / "images.pdf")] * 3
+        with Merger() as merger:
+            plain = merger.process(files, str(tmp_path / "plain.pdf"), streaming=streaming)
+        with Merger() as merger:
+            deduped = merger.process(files, str(tmp_path / "deduped.pdf"), streaming=streaming, dedupe=True)
+
+        assert deduped["duplicates_removed"] > 0
+        assert deduped["bytes_saved"] > 0
+        assert deduped["output_size"] < plain["output_size"]
+        assert count_pages(str(tmp_path / "deduped.pdf")) == 3 * count_pages(str(test_data_dir / "images.pdf"))
+
+    def test_parallel_merge_preserves_order(self, tmp_path, test_data_dir):
+        files = [
+            str(test_data_dir / "landscape.pdf"),
+            str(test_data_dir / "with_notes.pdf"),
+            str(test_data_dir / "a6size.pdf"),
+            str(test_data_dir / "scan_like.pdf"),
+            str(test_data_dir / "sample.pdf"),
+        ]
+        with Merger() as merger:
+            stats = merger.process(files, str(tmp_path / "parallel.pdf"), workers=2)
+        with Merger() as merger:
+            merger.process(files, str(tmp_path / "serial.pdf"), streaming=True)
+
+        parallel = PdfReader(str(tmp_path / "parallel.pdf"), strict=True).pages
+        serial = PdfReader(str(tmp_path / "serial.pdf")).pages
+        assert stats["page_count"] == len(serial)
+        assert [p.mediabox for p in parallel] == [p.mediabox for p in serial]
+        assert [p.extract_text() for p in parallel] == [p.extract_text() for p in serial]
+
+    def test_parallel_merge_small_chunks(self, tmp_path, test_data_dir, monkeypatch):
+        monkeypatch.setattr("src.modules.merge._FRAGMENT_CHUNK_BYTES", 7)
+        files = [
+            str(test_data_dir / name)
+            for name in ("with_notes.pdf", "sample.pdf", "landscape.pdf", "multipage_text.pdf", "a6size.pdf")
+        ]
+        with Merger() as merger:
+            merger.process(files, str(tmp_path / "parallel.pdf"), workers=2)
+        with Merger() as merger:
+            merger.process(files, str(tmp_path / "serial.pdf"), streaming=True)
+
+        parallel = PdfReader(str(tmp_path / "parallel.pdf"), strict=True).pages
+        serial = PdfReader(str(tmp_path / "serial.pdf")).pages
+        assert [p.extract_text() for p in parallel] == [p.extract_text() for p in serial]
+        # References are written back in their compact form, not zero-padded.
+        assert (tmp_path / "parallel.pdf").stat().st_size == (tmp_path / "serial.pdf").stat().st_size
+
+    def test_parallel_merge_missing_file(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            with pytest.raises(FileNotFoundError):
+                merger.process(
+                    [str(test_data_dir / "sample.pdf"), str(test_data_dir / "does_not_exist.pdf")],
+                    str(tmp_output),
+                    workers=2,
+                )
+        assert not tmp_output.exists()
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_progress_callback(self, tmp_output, test_data_dir, streaming):
+        files = [str(test_data_dir / "sample.pdf"), str(test_data_dir / "multipage_text.pdf")]
+        calls = []
+        with Merger() as merger:
+            merger.process(files, str(tmp_output), streaming=streaming, progress_callback=lambda *args: calls.append(args))
+
+        pages = count_pages(files[1])
+        assert calls[0] == (1, 2, 0, count_pages(files[0]))
+        assert (2, 2, 0, pages) in calls
+        assert calls[-1] == (2, 2, pages, pages)
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_cancel_leaves_no_output(self, tmp_output, test_data_dir, streaming):
+        files = [str(test_data_dir / "sample.pdf"), str(test_data_dir / "multipage_text.pdf")]
+        with Merger() as merger:
+            def cancel_on_second_file(file_number, total_files, page_number, page_count):
+                if file_number == 2:
+                    merger.cancel()
+
+            with pytest.raises(MergeCancelled):
+                merger.process(files, str(tmp_output), streaming=streaming, progress_callback=cancel_on_second_file)
+        assert list(tmp_output.parent.iterdir()) == []
+
+    def test_merger_can_be_reused_after_cancel(self, tmp_output, test_data_dir):
+        files = [str(test_data_dir / "sample.pdf"), str(test_data_dir / "multipage_text.pdf")]
+        with Merger() as merger:
+            with pytest.raises(MergeCancelled):
+                merger.process(files, str(tmp_output), progress_callback=lambda *args: merger.cancel())
+
+            stats = merger.process(files, str(tmp_output))
+        assert stats["page_count"] == count_pages(files[0]) + count_pages(files[1])
+        assert count_pages(str(tmp_output)) == stats["page_count"]
+
+    def test_probe_reports_each_input(self, tmp_path, test_data_dir):
+        files = [
+            str(test_data_dir / "multipage_text.pdf"),
+            str(test_data_dir / "corrupted.pdf"),
+            str(test_data_dir / "does_not_exist.pdf"),
+            str(tmp_path / "notes.txt"),
+        ]
+        reports = Merger.probe(files, workers=2)
+
+        assert [r["path"] for r in reports] == files
+        assert [r["status"] for r in reports] == ["ok", "corrupt", "missing", "invalid"]
+        assert reports[0]["page_count"] == count_pages(files[0])
+        assert reports[0]["size"] == (test_data_dir / "multipage_text.pdf").stat().st_size
+        assert reports[0]["header_ok"] and reports[0]["xref_ok"]
+        assert not reports[0]["encrypted"]
+
+    def test_probe_detects_encryption(self, tmp_path, test_data_dir):
+        from pypdf import PdfWriter
+        locked = tmp_path / "locked.pdf"
+        writer = PdfWriter(clone_from=str(test_data_dir / "sample.pdf"))
+        writer.encrypt("secret", algorithm="AES-256")
+        writer.write(str(locked))
+
+        report, = Merger.probe([str(locked)])
+        assert report["encrypted"]
+        assert report["status"] == "encrypted"
+
+    @pytest.mark.parametrize("options", [{}, {"streaming": True}, {"workers": 2}])
+    def test_page_ranges_per_entry(self, tmp_output, test_data_dir, options):
+        source = str(test_data_dir / "multipage_text.pdf")
+        entries = [(source, [0, 1]), str(test_data_dir / "landscape.pdf"), (source, range(0, 1))]
+        with Merger() as merger:
+            stats = merger.process(entries, str(tmp_output), **options)
+
+        merged = PdfReader(str(tmp_output)).pages
+        pages = PdfReader(source).pages
+        landscape = PdfReader(str(test_data_dir / "landscape.pdf")).pages[0]
+        assert stats["page_count"] == 4
+        assert [p.extract_text() for p in merged] == [
+            pages[0].extract_text(), pages[1].extract_text(), landscape.extract_text(), pages[0].extract_text()
+        ]
+
+    def test_streaming_reused_source_shares_objects(self, tmp_path, test_data_dir):
+        source = str(test_data_dir / "images.pdf")
+        with Merger() as merger:
+            separate = merger.process([source, source], str(tmp_path / "separate.pdf"), streaming=True)
+        with Merger() as merger:
+            shared = merger.process([(source, [0]), (source, [0])], str(tmp_path / "shared.pdf"), streaming=True)
+        with Merger() as merger:
+            single = merger.process([(source, [0])], str(tmp_path / "single.pdf"), streaming=True)
+
+        assert shared["page_count"] == 2
+        # The second copy of the page adds only its own page object.
+        assert shared["output_size"] - single["output_size"] < 200
+        assert shared["output_size"] < separate["output_size"]
+
+    def test_page_range_out_of_bounds(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            with pytest.raises(ValueError, match="out of range"):
+                merger.process([(str(test_data_dir / "sample.pdf"), [5])], str(tmp_output))
+
+    def test_append_writes_incremental_update(self, tmp_path, test_data_dir):
+        target = tmp_path / "case.pdf"
+        target.write_bytes((test_data_dir / "multipage_text.pdf").read_bytes())
+        original = target.read_bytes()
+        new_files = [str(test_data_dir / "sample.pdf"), str(test_data_dir / "landscape.pdf")]
+
+        with Merger() as merger:
+            stats = merger.process(new_files, str(target), append=True)
+
+        # The previous revision is left byte-for-byte in place.
+        assert target.read_bytes().startswith(original)
+        merged = PdfReader(str(target), strict=True).pages
+        expected = list(PdfReader(str(test_data_dir / "multipage_text.pdf")).pages)
+        expected += [page for f in new_files for page in PdfReader(f).pages]
+        assert stats["page_count"] == len(merged) == len(expected)
+        assert [p.extract_text() for p in merged] == [p.extract_text() for p in expected]
+
+    def test_append_failure_keeps_previous_revision(self, tmp_path, test_data_dir):
+        target = tmp_path / "case.pdf"
+        target.write_bytes((test_data_dir / "sample.pdf").read_bytes())
+        original = target.read_bytes()
+
+        with Merger() as merger:
+            with pytest.raises(FileNotFoundError):
+                merger.process(
+                    [str(test_data_dir / "blank.pdf"), str(test_data_dir / "does_not_exist.pdf")],
+                    str(target),
+                    append=True,
+                )
+        assert target.read_bytes() == original
+
+    def test_append_does_not_inherit_target_page_tree(self, tmp_path, test_data_dir):
+        import pikepdf
+
+        target = tmp_path / "case.pdf"
+        with pikepdf.open(test_data_dir / "sample.pdf") as pdf:
+            pdf.Root.Pages.CropBox = pikepdf.Array([0, 0, 300, 300])
+            pdf.Root.Pages.Rotate = 90
+            pdf.save(target)
+
+        with Merger() as merger:
+            merger.process([str(test_data_dir / "landscape.pdf")], str(target), append=True)
+
+        merged = PdfReader(str(target), strict=True).pages
+        appended = PdfReader(str(test_data_dir / "landscape.pdf")).pages[0]
+        assert merged[0].cropbox == [0, 0, 300, 300]
+        assert merged[-1].cropbox == appended.mediabox
+        assert merged[-1].rotation == appended.rotation
+
+    def test_append_creates_missing_output(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            stats = merger.process([str(test_data_dir / "sample.pdf")], str(tmp_output), append=True)
+        assert stats["page_count"] == count_pages(str(tmp_output)) == 1
+
+    def test_append_to_itself(self, tmp_path, test_data_dir):
+        target = tmp_path / "case.pdf"
+        target.write_bytes((test_data_dir / "sample.pdf").read_bytes())
+        with Merger() as merger:
+            with pytest.raises(ValueError):
+                merger.process([str(target)], str(target), append=True)
+
+    @pytest.mark.parametrize("profile", Merger.get_output_profiles())
+    def test_output_profiles(self, tmp_output, test_data_dir, profile):
+        files = [str(test_data_dir / "big_text.pdf"), str(test_data_dir / "multipage_text.pdf")]
+        with Merger() as merger:
+            stats = merger.process(files, str(tmp_output), streaming=True, optimize=profile)
+
+        assert count_pages(str(tmp_output)) == sum(count_pages(f) for f in files)
+        assert stats["output_size"] == tmp_output.stat().st_size
+        assert stats["output_size"] < stats["unoptimized_size"]
+        assert {"merge", "optimize_open", "optimize_write"} <= set(stats["timings"])
+        assert [p.name for p in tmp_output.parent.iterdir()] == [tmp_output.name]
+
+    def test_output_profile_keeps_shared_resources(self, tmp_path, test_data_dir):
+        import pikepdf
+
+        shared = tmp_path / "shared.pdf"
+        with pikepdf.new() as pdf:
+            image = pdf.make_stream(
+                bytes(range(256)) * 64, Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image, Width=128, Height=128,
+                ColorSpace=pikepdf.Name.DeviceGray, BitsPerComponent=8,
+            )
+            resources = pdf.make_indirect(pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image)))
+            for _ in range(4):
+                pdf.add_blank_page()
+                pdf.pages[-1].Resources = resources
+                pdf.pages[-1].Contents = pdf.make_stream(b"q 128 0 0 128 0 0 cm /Im0 Do Q")
+            pdf.save(shared)
+
+        files = [str(shared), str(test_data_dir / "sample.pdf")]
+        with Merger() as merger:
+            stats = merger.process(files, str(tmp_path / "merged.pdf"), streaming=True, optimize="fast")
+
+        pages = PdfReader(str(tmp_path / "merged.pdf")).pages
+        assert len({page.raw_get("/Resources").idnum for page in pages[:4]}) == 1
+        assert stats["output_size"] < stats["unoptimized_size"]
+
+    def test_unknown_output_profile(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            with pytest.raises(ValueError):
+                merger.process([str(test_data_dir / "sample.pdf")], str(tmp_output), optimize="tiny")
+
+    def test_output_profile_with_append(self, tmp_output, test_data_dir):
+        with Merger() as merger:
+            with pytest.raises(ValueError):
+                merger.process([str(test_data_dir / "sample.pdf")], str(tmp_output), append=True, optimize="fast")
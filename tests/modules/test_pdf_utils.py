@@ -1,6 +1,8 @@
 import pytest
 from pathlib import Path
-from src.modules.pdf_utils import parse_page_numbers, get_pdf_info
+import pikepdf
+from pypdf import PdfReader
+from src.modules.pdf_utils import parse_page_numbers, get_pdf_info, get_page_count
 
 
 @pytest.fixture
@@ -82,3 +84,25 @@ def test_get_pdf_info_invalid_file():
     """Test getting PDF info from non-existent file."""
     with pytest.raises(FileNotFoundError):
         get_pdf_info("nonexistent.pdf")
+
+
+def test_get_page_count_reads_page_tree(test_data_dir):
+    """Test that the page count comes from /Count without loading the pages."""
+    reader = PdfReader(test_data_dir / "multipage_text.pdf")
+
+    assert get_page_count(reader) == 6
+    assert reader.flattened_pages is None
+
+
+@pytest.mark.parametrize("count", [None, "/Six", -1])
+def test_get_page_count_falls_back_to_pages(tmp_path, test_data_dir, count):
+    """Test that pages are counted when /Count is missing or invalid."""
+    path = tmp_path / "count.pdf"
+    with pikepdf.open(test_data_dir / "multipage_text.pdf") as pdf:
+        if count is None:
+            del pdf.Root.Pages.Count
+        else:
+            pdf.Root.Pages.Count = pikepdf.Name(count) if isinstance(count, str) else count
+        pdf.save(path)
+
+    assert get_page_count(PdfReader(path)) == 6
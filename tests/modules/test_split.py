@@ -1,8 +1,11 @@
 import pytest
 import os
+import zlib
 from pathlib import Path
-from pypdf import PdfReader
-from src.modules.split import Splitter
+from pypdf import PdfReader, PdfWriter
+from reportlab.pdfgen import canvas
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, RectangleObject, StreamObject
+from src.modules.split import SplitCancelled, Splitter
 
 
 @pytest.fixture
@@ -11,6 +14,132 @@ def test_data_dir():
     return Path(__file__).parent.parent / "data"
 
 
+@pytest.fixture
+def shared_resources_pdf(tmp_path, test_data_dir):
+    """A PDF whose pages all share one /Resources dictionary holding every image."""
+    writer = PdfWriter()
+    for page in PdfReader(str(test_data_dir / "images.pdf")).pages:
+        writer.add_page(page)
+
+    images = DictionaryObject()
+    for number, page in enumerate(writer.pages):
+        images[NameObject(f"/Im{number}")] = page["/Resources"].raw_get("/XObject").raw_get("/Im1")
+    shared = writer._add_object(DictionaryObject({NameObject("/XObject"): images}))
+    for number, page in enumerate(writer.pages):
+        content = StreamObject()
+        content.set_data(f"q 400 0 0 300 106 246 cm /Im{number} Do Q".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = shared
+
+    path = tmp_path / "shared.pdf"
+    writer.write(str(path))
+    return path
+
+
+@pytest.fixture
+def outline_pdf(tmp_path, test_data_dir):
+    """A 12-page PDF with three chapters, the second with two sections, starting on page 3."""
+    writer = PdfWriter()
+    for page in PdfReader(str(test_data_dir / "big_text.pdf")).pages[:12]:
+        writer.add_page(page)
+
+    writer.add_outline_item("Chapter 1", 2)
+    chapter = writer.add_outline_item("Chapter 2: Results", 5)
+    writer.add_outline_item("Section 2.1", 5, parent=chapter)
+    writer.add_outline_item("Section 2.2", 7, parent=chapter)
+    writer.add_outline_item("Chapter 3", 9)
+
+    path = tmp_path / "outline.pdf"
+    writer.write(str(path))
+    return path
+
+
+@pytest.fixture
+def separated_batch_pdf(tmp_path, test_data_dir):
+    """A scanned batch of three documents split by an empty page, a blank scan and a white-filled page."""
+    text = PdfReader(str(test_data_dir / "big_text.pdf")).pages
+    writer = PdfWriter()
+    writer.add_page(text[0])
+    writer.add_page(text[1])
+    writer.add_blank_page(612, 792)
+    writer.add_page(text[2])
+
+    scan = StreamObject()
+    scan.set_data(zlib.compress(b"\xff" * 850 * 1100))
+    scan.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(850),
+        NameObject("/Height"): NumberObject(1100),
+        NameObject("/ColorSpace"): NameObject("/DeviceGray"),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject("/FlateDecode"),
+    })
+    for content, resources in (
+        (b"q 612 0 0 792 0 0 cm /Im0 Do Q", {NameObject("/XObject"): DictionaryObject({
+            NameObject("/Im0"): writer._add_object(scan)
+        })}),
+        (b"1 g 0 0 612 792 re f", {}),
+    ):
+        page = writer.add_blank_page(612, 792)
+        stream = StreamObject()
+        stream.set_data(content)
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject(resources)
+
+    writer.add_page(PdfReader(str(test_data_dir / "images.pdf")).pages[0])
+    writer.add_page(text[3])
+
+    path = tmp_path / "batch.pdf"
+    writer.write(str(path))
+    return path
+
+
+@pytest.fixture
+def invoice_batch_pdf(tmp_path):
+    """Seven pages of three invoices, the first of which starts with a cover page."""
+    path = tmp_path / "invoices.pdf"
+    pdf = canvas.Canvas(str(path))
+    pages = ["Batch cover", "Invoice No: 1001", "Items, continued", "Invoice No: 1002",
+             "Invoice No: 1003", "Items, continued", "Totals"]
+    for text in pages:
+        pdf.drawString(72, 720, text)
+        pdf.drawString(72, 700, "Acme Corporation (Invoices) \\ Dept. 7")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def nested_pages_pdf(tmp_path, test_data_dir):
+    """A PDF whose page tree has two levels, the second node giving its pages a MediaBox."""
+    writer = PdfWriter()
+    for page in PdfReader(str(test_data_dir / "big_text.pdf")).pages[:5]:
+        writer.add_page(page)
+
+    root = writer._root_object["/Pages"]
+    pages = [page.indirect_reference for page in writer.pages]
+    nodes = ArrayObject()
+    for kids in (pages[:2], pages[2:]):
+        node = writer._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(kids),
+            NameObject("/Count"): NumberObject(len(kids)),
+            NameObject("/Parent"): root.indirect_reference,
+        }))
+        for kid in kids:
+            kid.get_object()[NameObject("/Parent")] = node
+        nodes.append(node)
+    for kid in pages[2:]:
+        del kid.get_object()["/MediaBox"]
+    nodes[1].get_object()[NameObject("/MediaBox")] = RectangleObject([0, 0, 200, 300])
+    root[NameObject("/Kids")] = nodes
+
+    path = tmp_path / "nested.pdf"
+    writer.write(str(path))
+    return path
+
+
 def test_split_by_pages_single_page(tmp_path, test_data_dir):
     """Test splitting PDF into single-page files."""
     with Splitter(str(test_data_dir / "sample.pdf")) as splitter:
@@ -103,3 +232,288 @@ def test_extract_from_mixed_content(tmp_path, test_data_dir):
     assert os.path.exists(output_path)
     reader = PdfReader(output_path)
     assert len(reader.pages) == 2
+
+
+def test_parallel_split_matches_serial(tmp_path, test_data_dir):
+    """Test that a parallel split writes the same files as a serial one."""
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    serial_dir.mkdir()
+    parallel_dir.mkdir()
+
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        serial_count = splitter.split_by_pages(str(serial_dir), pages_per_file=7)
+        parallel_count = splitter.split_by_pages(str(parallel_dir), pages_per_file=7, workers=3)
+
+    assert parallel_count == serial_count
+    for i in range(1, serial_count + 1):
+        assert (parallel_dir / f"split_{i}.pdf").read_bytes() == (serial_dir / f"split_{i}.pdf").read_bytes()
+
+
+def test_split_prunes_shared_resources(tmp_path, shared_resources_pdf):
+    """Test that each part keeps only the resources its pages use."""
+    plain_dir = tmp_path / "plain"
+    pruned_dir = tmp_path / "pruned"
+    plain_dir.mkdir()
+    pruned_dir.mkdir()
+
+    with Splitter(str(shared_resources_pdf)) as splitter:
+        splitter.split_by_pages(str(plain_dir), pages_per_file=1)
+        plain = splitter.part_stats
+        splitter.split_by_pages(str(pruned_dir), pages_per_file=1, prune_resources=True)
+        pruned = splitter.part_stats
+
+    assert len(pruned) == 3
+    for number, (before, after) in enumerate(zip(plain, pruned, strict=True)):
+        assert after["pruned_bytes"] > 0
+        assert after["size"] < before["size"]
+        page = PdfReader(after["path"]).pages[0]
+        assert list(page["/Resources"]["/XObject"]) == [f"/Im{number}"]
+
+
+def test_extract_prunes_shared_resources(tmp_path, shared_resources_pdf):
+    """Test that extraction reports the bytes pruned from the output."""
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(str(shared_resources_pdf)) as splitter:
+        splitter.extract_pages(output_path, [2, 0], prune_resources=True)
+        stats, = splitter.part_stats
+
+    assert stats["page_count"] == 2
+    assert stats["pruned_bytes"] > 0
+    assert stats["size"] == os.path.getsize(output_path)
+
+
+def test_split_by_size_respects_budget(tmp_path, test_data_dir):
+    """Test that splitting by size keeps every part within the budget."""
+    source = PdfReader(str(test_data_dir / "big_text.pdf"))
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        count = splitter.split_by_size(str(tmp_path), max_bytes=10000)
+        stats = splitter.part_stats
+
+    assert count == len(stats) > 1
+    assert sum(part["page_count"] for part in stats) == len(source.pages)
+    for part in stats:
+        assert part["size"] <= 10000
+        assert part["size"] == os.path.getsize(part["path"])
+
+
+def test_split_by_size_invalid_budget(tmp_path, test_data_dir):
+    """Test that a non-positive size budget is rejected."""
+    with Splitter(str(test_data_dir / "sample.pdf")) as splitter:
+        with pytest.raises(ValueError):
+            splitter.split_by_size(str(tmp_path), max_bytes=0)
+
+
+def test_splitter_opens_lazily(tmp_path):
+    """Test that the source is only opened when it is first used."""
+    splitter = Splitter(str(tmp_path / "missing.pdf"))
+    with pytest.raises(FileNotFoundError):
+        splitter.extract_pages(str(tmp_path / "extracted.pdf"), [0])
+
+
+def test_extract_pages_loads_only_requested_pages(tmp_path, test_data_dir):
+    """Test that extraction does not load every page of the source."""
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        splitter.extract_pages(output_path, [100, 3])
+        assert splitter.reader.flattened_pages is None
+
+    expected = PdfReader(str(test_data_dir / "big_text.pdf"))
+    reader = PdfReader(output_path)
+    assert [page.extract_text() for page in reader.pages] == [
+        expected.pages[100].extract_text(), expected.pages[3].extract_text()
+    ]
+
+
+def test_extract_pages_from_nested_page_tree(tmp_path, nested_pages_pdf):
+    """Test that pages deep in the page tree are found and keep inherited attributes."""
+    expected = PdfReader(str(nested_pages_pdf))
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(str(nested_pages_pdf)) as splitter:
+        assert splitter.page_count == 5
+        splitter.extract_pages(output_path, [4, 1, 2])
+        assert splitter.reader.flattened_pages is None
+
+    reader = PdfReader(output_path)
+    assert [page.extract_text() for page in reader.pages] == [
+        expected.pages[number].extract_text() for number in (4, 1, 2)
+    ]
+    assert list(reader.pages[0].mediabox) == [0, 0, 200, 300]
+    assert list(reader.pages[1].mediabox) == list(expected.pages[1].mediabox)
+
+
+def test_split_by_outline(tmp_path, outline_pdf):
+    """Test that top-level bookmarks each start a part."""
+    with Splitter(str(outline_pdf)) as splitter:
+        count = splitter.split_by_outline(str(tmp_path))
+        stats = splitter.part_stats
+
+    assert count == 4
+    assert [part["title"] for part in stats] == ["Front matter", "Chapter 1", "Chapter 2: Results", "Chapter 3"]
+    assert [part["page_count"] for part in stats] == [2, 3, 4, 3]
+    assert os.path.basename(stats[2]["path"]) == "03_Chapter 2_ Results.pdf"
+    for part in stats:
+        assert len(PdfReader(part["path"]).pages) == part["page_count"]
+
+
+def test_split_by_outline_nested(tmp_path, outline_pdf):
+    """Test that deeper bookmarks split further and duplicates start no empty part."""
+    with Splitter(str(outline_pdf)) as splitter:
+        splitter.split_by_outline(str(tmp_path), max_depth=2)
+        stats = splitter.part_stats
+
+    assert [part["title"] for part in stats] == ["Front matter", "Chapter 1", "Section 2.1", "Section 2.2", "Chapter 3"]
+    assert [part["page_count"] for part in stats] == [2, 3, 2, 2, 3]
+
+
+def test_find_blank_pages(separated_batch_pdf):
+    """Test that empty pages, blank scans and white-filled pages are found."""
+    with Splitter(str(separated_batch_pdf)) as splitter:
+        assert splitter.find_blank_pages() == [2, 4, 5]
+
+
+def test_split_on_blank_pages(tmp_path, separated_batch_pdf):
+    """Test that the batch is split at its separators, which are dropped."""
+    with Splitter(str(separated_batch_pdf)) as splitter:
+        count = splitter.split_on_blank_pages(str(tmp_path))
+        stats = splitter.part_stats
+
+    assert count == 3
+    assert [part["page_count"] for part in stats] == [2, 1, 2]
+    assert "/XObject" in PdfReader(stats[2]["path"]).pages[0]["/Resources"]
+
+
+def test_iter_parts_matches_split_files(tmp_path, test_data_dir):
+    """Test that in-memory parts hold the same PDFs split_by_pages writes."""
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        count = splitter.split_by_pages(str(tmp_path), pages_per_file=50)
+        parts = [(page_numbers, buffer.getvalue()) for page_numbers, buffer in splitter.iter_parts(pages_per_file=50)]
+
+    assert [page_numbers for page_numbers, _ in parts] == [range(0, 50), range(50, 100), range(100, 120)]
+    assert len(parts) == count
+    for number, (_, data) in enumerate(parts, start=1):
+        assert data == (tmp_path / f"split_{number}.pdf").read_bytes()
+
+
+def test_iter_parts_with_page_ranges(test_data_dir):
+    """Test that explicit page ranges are yielded as given."""
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        parts = list(splitter.iter_parts(page_ranges=[[5, 2], range(10, 13)]))
+
+    assert [page_numbers for page_numbers, _ in parts] == [[5, 2], range(10, 13)]
+    assert [len(PdfReader(buffer).pages) for _, buffer in parts] == [2, 3]
+
+
+@pytest.mark.parametrize("engine", ["pypdf", "pikepdf"])
+def test_extract_pages_engines(tmp_path, shared_resources_pdf, engine):
+    """Test that both extraction engines copy the requested pages and prune their resources."""
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(str(shared_resources_pdf)) as splitter:
+        splitter.extract_pages(output_path, [2, 0, 7], prune_resources=True, engine=engine)
+        stats, = splitter.part_stats
+
+    reader = PdfReader(output_path)
+    assert stats["page_count"] == len(reader.pages) == 2
+    assert list(reader.pages[0]["/Resources"]["/XObject"]) == ["/Im2"]
+    assert list(reader.pages[1]["/Resources"]["/XObject"]) == ["/Im0"]
+
+
+def test_extract_pages_native_engine_keeps_stream_encoding(tmp_path, test_data_dir):
+    """Test that the pikepdf engine copies streams without decoding or re-encoding them."""
+    input_path = str(test_data_dir / "large_file.pdf")
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(input_path) as splitter:
+        splitter.extract_pages(output_path, [0, 5000], engine="pikepdf")
+
+    source = PdfReader(input_path).pages
+    for page, original in zip(PdfReader(output_path).pages, (source[0], source[5000]), strict=True):
+        stream, original_stream = page["/Contents"].get_object(), original["/Contents"].get_object()
+        assert stream["/Filter"] == original_stream["/Filter"] == ["/ASCII85Decode", "/FlateDecode"]
+        assert stream._data == original_stream._data
+
+
+def test_extract_pages_auto_engine(tmp_path, test_data_dir):
+    """Test that the automatic engine choice depends on the share of pages extracted."""
+    output_path = f"{tmp_path}/extracted.pdf"
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        splitter.extract_pages(output_path, [0, 1], engine="auto")
+        assert splitter.part_stats[0]["pruned_bytes"] == 0
+        splitter.extract_pages(output_path, list(range(60)), engine="auto")
+        assert splitter.part_stats[0]["pruned_bytes"] is None
+
+    assert len(PdfReader(output_path).pages) == 60
+
+
+def test_extract_pages_unknown_engine(tmp_path, test_data_dir):
+    """Test that an unknown engine is rejected."""
+    with Splitter(str(test_data_dir / "sample.pdf")) as splitter:
+        with pytest.raises(ValueError):
+            splitter.extract_pages(f"{tmp_path}/extracted.pdf", [0], engine="qpdf")
+
+
+def test_split_progress_callback(tmp_path, test_data_dir):
+    """Test that splitting reports each part as it is written."""
+    calls = []
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        splitter.split_by_pages(str(tmp_path), pages_per_file=50, progress_callback=lambda *args: calls.append(args))
+
+    assert calls == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_split_cancel_stops_after_current_part(tmp_path, test_data_dir):
+    """Test that a cancelled split keeps the parts written so far and stops."""
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        def cancel_after_first_part(part_number, total_parts):
+            splitter.cancel()
+
+        with pytest.raises(SplitCancelled):
+            splitter.split_by_pages(str(tmp_path), pages_per_file=10, progress_callback=cancel_after_first_part)
+        stats = splitter.part_stats
+
+    assert [part["path"] for part in stats] == [f"{tmp_path}/split_1.pdf"]
+    assert sorted(os.listdir(tmp_path)) == ["split_1.pdf"]
+
+
+def test_extract_cancel_leaves_no_output(tmp_path, test_data_dir):
+    """Test that a cancelled extraction writes no file."""
+    output_path = tmp_path / "extracted.pdf"
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        def cancel_on_second_page(page_number, page_count):
+            if page_number == 2:
+                splitter.cancel()
+
+        with pytest.raises(SplitCancelled):
+            splitter.extract_pages(str(output_path), [0, 1, 2], progress_callback=cancel_on_second_page)
+
+    assert not output_path.exists()
+
+
+def test_splitter_can_be_reused_after_cancel(tmp_path, test_data_dir):
+    """Test that a cancelled operation does not cancel the next one on the same splitter."""
+    output_path = tmp_path / "extracted.pdf"
+    with Splitter(str(test_data_dir / "big_text.pdf")) as splitter:
+        with pytest.raises(SplitCancelled):
+            splitter.extract_pages(str(output_path), [0, 1, 2], progress_callback=lambda *args: splitter.cancel())
+
+        splitter.extract_pages(str(output_path), [0, 1, 2])
+        assert splitter.split_by_pages(str(tmp_path), pages_per_file=50) == 3
+
+    assert len(PdfReader(output_path).pages) == 3
+
+
+def test_find_text_pages(invoice_batch_pdf):
+    """Test that pages are matched on the text their content streams show."""
+    with Splitter(str(invoice_batch_pdf)) as splitter:
+        assert splitter.find_text_pages(r"Invoice No: \d+") == [1, 3, 4]
+        assert splitter.find_text_pages(r"\(Invoices\) \\ Dept") == list(range(7))
+
+
+def test_split_on_text(tmp_path, invoice_batch_pdf):
+    """Test that every matching page starts a part, after a leading part for earlier pages."""
+    with Splitter(str(invoice_batch_pdf)) as splitter:
+        count = splitter.split_on_text(str(tmp_path), r"Invoice No:")
+        stats = splitter.part_stats
+
+    assert count == 4
+    assert [part["page_count"] for part in stats] == [1, 2, 1, 3]
+    assert "Invoice No: 1003" in PdfReader(stats[3]["path"]).pages[0].extract_text()
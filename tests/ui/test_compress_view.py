@@ -91,3 +91,39 @@ def test_hide_status(compress_view):
     
     compress_view._hide_status()
     assert not compress_view.status_container.isVisible()
+
+
+def test_compress_view_has_target_size_option(compress_view):
+    """Test that compress view offers compressing to a target size."""
+    assert not compress_view.target_checkbox.isChecked()
+    assert not compress_view.target_spinbox.isEnabled()
+    assert compress_view.target_spinbox.suffix() == " MB"
+
+
+def test_target_size_option_toggles_level(compress_view):
+    """Test that compressing to a target size disables the level choice."""
+    compress_view.target_checkbox.setChecked(True)
+    assert compress_view.target_spinbox.isEnabled()
+    assert not compress_view.level_combo.isEnabled()
+
+    compress_view.target_checkbox.setChecked(False)
+    assert not compress_view.target_spinbox.isEnabled()
+    assert compress_view.level_combo.isEnabled()
+
+
+def test_compress_worker_passes_target_size(tmp_path, monkeypatch):
+    """Test that the worker forwards the target size to the compressor."""
+    from src.modules.compress import Compressor
+    from src.ui.compress_view import CompressWorker
+
+    received = {}
+
+    def compress(self, output_path, level, **kwargs):
+        received.update(kwargs)
+        return {}
+
+    monkeypatch.setattr(Compressor, "compress", compress)
+    worker = CompressWorker("input.pdf", str(tmp_path / "out.pdf"), "medium", target_bytes=5 * 1024 * 1024)
+    worker.run()
+
+    assert received["target_bytes"] == 5 * 1024 * 1024
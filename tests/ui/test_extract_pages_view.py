@@ -143,3 +143,44 @@ def test_extract_without_page_numbers(qtbot, test_data_dir):
     
     assert view.status_container.isVisible()
     assert "enter page numbers" in view.status_label.text().lower()
+
+
+def test_progress_hidden_initially(qtbot):
+    """Test that progress and cancel are only shown while extracting."""
+    view = ExtractView()
+    qtbot.addWidget(view)
+    view.show()
+
+    assert not view.progress_container.isVisible()
+    assert not view.cancel_btn.isVisible()
+
+
+def test_extract_worker_emits_progress(qtbot, tmp_path, test_data_dir):
+    """Test that the extract worker reports pages and finishes with the output stats."""
+    from src.ui.extract_pages_view import ExtractWorker
+    output = tmp_path / "extracted.pdf"
+
+    worker = ExtractWorker(str(test_data_dir / "big_text.pdf"), str(output), [0, 1])
+    updates = []
+    worker.page_progress.connect(lambda current, total: updates.append((current, total)))
+    with qtbot.waitSignal(worker.finished, timeout=10000) as blocker:
+        worker.start()
+    worker.wait()
+
+    assert updates == [(1, 2), (2, 2)]
+    assert blocker.args[0]["page_count"] == 2
+    assert output.exists()
+
+
+def test_extract_worker_cancel(qtbot, tmp_path, test_data_dir):
+    """Test that a cancelled extraction emits cancelled and writes nothing."""
+    from src.ui.extract_pages_view import ExtractWorker
+    output = tmp_path / "extracted.pdf"
+
+    worker = ExtractWorker(str(test_data_dir / "big_text.pdf"), str(output), [0, 1])
+    worker.cancel()
+    with qtbot.waitSignal(worker.cancelled, timeout=10000):
+        worker.start()
+    worker.wait()
+
+    assert not output.exists()
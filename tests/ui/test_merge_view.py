@@ -41,6 +41,13 @@ def test_merge_view_has_buttons(merge_view):
     assert merge_view.remove_btn is not None
     assert merge_view.clear_btn is not None
     assert merge_view.merge_btn is not None
+    assert merge_view.cancel_btn is not None
+
+
+def test_progress_hidden_initially(merge_view):
+    """Test that progress and cancel are only shown while merging."""
+    assert not merge_view.progress_container.isVisible()
+    assert not merge_view.cancel_btn.isVisible()
 
 
 def test_buttons_disabled_initially(merge_view):
@@ -164,3 +171,56 @@ def test_merge_view_with_mixed_content(merge_view):
         merge_view.file_list.addItem(str(test_file))
         merge_view._update_button_states()
         assert merge_view.clear_btn.isEnabled()
+
+
+def test_merge_worker_emits_progress(app, qtbot, tmp_path):
+    """Test that the merge worker reports per-file progress and finishes."""
+    from pathlib import Path
+    from src.ui.merge_view import MergeWorker
+    data_dir = Path(__file__).parent.parent / "data"
+    files = [str(data_dir / "sample.pdf"), str(data_dir / "blank.pdf")]
+    output = tmp_path / "merged.pdf"
+
+    worker = MergeWorker(files, str(output))
+    file_updates = []
+    worker.file_progress.connect(lambda current, total: file_updates.append((current, total)))
+    with qtbot.waitSignal(worker.finished, timeout=10000):
+        worker.start()
+    worker.wait()
+
+    assert file_updates == [(1, 2), (2, 2)]
+    assert output.exists()
+
+
+def test_merge_worker_cancel(app, qtbot, tmp_path):
+    """Test that a cancelled merge emits cancelled and writes nothing."""
+    from pathlib import Path
+    from src.ui.merge_view import MergeWorker
+    data_dir = Path(__file__).parent.parent / "data"
+    output = tmp_path / "merged.pdf"
+
+    worker = MergeWorker([str(data_dir / "sample.pdf"), str(data_dir / "blank.pdf")], str(output))
+    worker.cancel()
+    with qtbot.waitSignal(worker.cancelled, timeout=10000):
+        worker.start()
+    worker.wait()
+
+    assert not output.exists()
+
+
+def test_dropped_files_are_probed(merge_view, qtbot):
+    """Test that dropped files get page-count and status columns filled in."""
+    from pathlib import Path
+    data_dir = Path(__file__).parent.parent / "data"
+    files = [str(data_dir / "multipage_text.pdf"), str(data_dir / "corrupted.pdf")]
+
+    merge_view._handle_dropped_files(files)
+    qtbot.waitUntil(lambda: len(merge_view.probe_reports) == 2, timeout=10000)
+
+    pages_label, status_label = merge_view._file_rows[files[0]]
+    assert pages_label.text() == "6"
+    assert status_label.text() == "OK"
+    assert merge_view.probe_reports[files[1]]["status"] == "corrupt"
+
+    merge_view.merge_files()
+    assert "corrupted.pdf" in merge_view.status_label.text()
@@ -52,6 +52,26 @@ def test_split_view_has_page_range_label(split_view):
     assert split_view.page_range_label.text() == "(Max: 1)"
 
 
+def test_split_view_has_size_option(split_view):
+    """Test that split view offers splitting by file size."""
+    assert not split_view.size_checkbox.isChecked()
+    assert not split_view.size_spinbox.isEnabled()
+    assert split_view.size_spinbox.suffix() == " MB"
+
+
+def test_size_option_toggles_page_controls(split_view):
+    """Test that splitting by size disables the pages per file controls."""
+    split_view.options_section.setEnabled(True)
+    split_view.size_checkbox.setChecked(True)
+    assert split_view.size_spinbox.isEnabled()
+    assert not split_view.pages_spinbox.isEnabled()
+    assert not split_view.pages_slider.isEnabled()
+
+    split_view.clear_file()
+    assert not split_view.size_checkbox.isChecked()
+    assert split_view.pages_spinbox.isEnabledTo(split_view.options_section)
+
+
 def test_split_view_has_status_container(split_view):
     """Test that status container exists."""
     assert split_view.status_container is not None
@@ -165,3 +185,42 @@ def test_back_callback(app):
     
     view = SplitView(on_back_click=on_back_click)
     assert view is not None
+
+
+def test_progress_hidden_initially(split_view):
+    """Test that progress and cancel are only shown while splitting."""
+    assert not split_view.progress_container.isVisible()
+    assert not split_view.cancel_btn.isVisible()
+
+
+def test_split_worker_emits_progress(app, qtbot, tmp_path):
+    """Test that the split worker reports each part and finishes with their stats."""
+    from pathlib import Path
+    from src.ui.split_view import SplitWorker
+    data_dir = Path(__file__).parent.parent / "data"
+
+    worker = SplitWorker(str(data_dir / "big_text.pdf"), str(tmp_path), pages_per_file=50)
+    updates = []
+    worker.part_progress.connect(lambda current, total: updates.append((current, total)))
+    with qtbot.waitSignal(worker.finished, timeout=10000) as blocker:
+        worker.start()
+    worker.wait()
+
+    assert updates == [(1, 3), (2, 3), (3, 3)]
+    assert len(blocker.args[0]) == 3
+
+
+def test_split_worker_cancel(app, qtbot, tmp_path):
+    """Test that a split cancelled before it starts writes nothing and says so."""
+    from pathlib import Path
+    from src.ui.split_view import SplitWorker
+    data_dir = Path(__file__).parent.parent / "data"
+
+    worker = SplitWorker(str(data_dir / "big_text.pdf"), str(tmp_path), pages_per_file=50)
+    worker.cancel()
+    with qtbot.waitSignal(worker.cancelled, timeout=10000) as blocker:
+        worker.start()
+    worker.wait()
+
+    assert blocker.args[0] == []
+    assert list(tmp_path.iterdir()) == []